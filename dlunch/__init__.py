@@ -35,9 +35,10 @@ def create_app(config: DictConfig) -> pn.Template:
     log.info("starting initialization process")
 
     # Create an instance of AuthUser (that includes an instance of AuthContext)
-    # and a waiter instance
+    # and a waiter instance (sharing the same user, so that the user profile
+    # is loaded once)
     auth_user = AuthUser(config=config)
-    waiter = Waiter(config=config)
+    waiter = Waiter(config=config, auth_user=auth_user)
 
     log.info("initialize database")
     # Create tables
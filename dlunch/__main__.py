@@ -7,6 +7,7 @@ import panel as pn
 from omegaconf import DictConfig
 
 from . import auth
+from . import state
 from . import create_app, create_backend
 from .scheduled_tasks import TaskManager
 
@@ -75,6 +76,11 @@ def run_app(config: DictConfig) -> None:
     scheduled_task_manager.log_tasks(enabled_only=True)
     scheduled_task_manager.schedule_all()
 
+    # Share lunch data changes with other processes
+    log.info("set change notifier")
+    notifier = hydra.utils.instantiate(config.db.notifier, config)
+    state.set_notifier(notifier, listen=False)
+
     # Call the app factory function
     log.info("set config for app factory function")
     # Pass the create_app and create_backend function as a lambda function to
@@ -108,6 +114,9 @@ def run_app(config: DictConfig) -> None:
 
     # Set session begin/end logs
     pn.state.on_session_created(lambda ctx: log.debug("session created"))
+    # Start listening for changes only once sessions exist (the listener
+    # thread is started once per process, also when the server forks)
+    pn.state.on_session_created(lambda ctx: state.set_notifier(notifier))
     pn.state.on_session_destroyed(lambda ctx: log.debug("session closed"))
 
     pn.serve(
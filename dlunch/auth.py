@@ -4,15 +4,20 @@
 # the type hints in this file to be interpreted as strings
 from __future__ import annotations
 
+import asyncio
 import logging
 import json
+import os
 import pandas as pd
 import panel as pn
 import re
 import secrets
 import string
+import threading
+import time
 import tornado
 
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.fernet import Fernet, InvalidToken
 from omegaconf import DictConfig
 from omegaconf.errors import ConfigAttributeError
@@ -20,11 +25,12 @@ from panel.auth import OAuthProvider
 from panel.util import base64url_encode
 from passlib.context import CryptContext
 from passlib.utils import saslprep
-from sqlalchemy.sql import true as sql_true
 from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 from time import sleep
 from tornado.web import RequestHandler
-from typing import Self, TYPE_CHECKING
+from typing import Any, Callable, Self, TYPE_CHECKING
 
 # Package imports
 from . import models
@@ -59,6 +65,240 @@ pwd_context: CryptContext = CryptContext(
 )
 """Crypt context with configurations for passlib (selected algorithm, etc.)."""
 
+# PASSWORD HASHING EXECUTOR ---------------------------------------------------
+_HASH_EXECUTORS: dict[int, ThreadPoolExecutor] = {}
+"""Thread pools used to verify password hashes (keys are PIDs, so that forked
+processes do not share the same pool)."""
+_hash_executors_lock: threading.Lock = threading.Lock()
+"""Lock used to create a single thread pool."""
+
+
+def get_hash_executor(config: DictConfig) -> ThreadPoolExecutor:
+    """Return the thread pool used to verify password hashes during login.
+
+    The pool is bounded (`basic_auth.hash_workers`), so that a burst of logins
+    does not use every CPU. Threads are enough, since the hashing function of
+    pbkdf2_sha256 releases the GIL.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+
+    Returns:
+        ThreadPoolExecutor: thread pool.
+    """
+    with _hash_executors_lock:
+        executor = _HASH_EXECUTORS.get(os.getpid())
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=config.basic_auth.hash_workers,
+                thread_name_prefix="data_lunch_hash",
+            )
+            _HASH_EXECUTORS[os.getpid()] = executor
+
+    return executor
+
+
+# PRIVILEGED USERS CACHE ------------------------------------------------------
+class PrivilegedUsersCache:
+    """Process-wide cache of the `privileged_users` table.
+
+    Privileged users are checked many times for every request and page load,
+    so the table is kept in memory for a short time (TTL). Changes made by
+    this process invalidate the cache immediately (see `invalidate`), changes
+    made by other processes are seen when the TTL expires.
+    """
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        """Lock used to protect cached values."""
+        self._users: dict[Any, tuple[float, dict[str, bool]]] = {}
+        """Cached users (keys are engines, values are load time and a
+        dictionary with usernames as keys and admin flags as values)."""
+        self.generation: int = 0
+        """Counter increased by every invalidation (caches of values derived
+        from privileged users use it to detect changes)."""
+
+    def get(
+        self,
+        key: Any,
+        ttl: float,
+        loader: Callable[[], dict[str, bool]],
+    ) -> dict[str, bool]:
+        """Return privileged users, load them if missing or expired.
+
+        Args:
+            key (Any): cache key (the engine of the database).
+            ttl (float): time to live (seconds).
+            loader (Callable[[], dict[str, bool]]): function that queries the
+                database and returns usernames with their admin flags.
+
+        Returns:
+            dict[str, bool]: usernames (keys) and admin flags (values).
+        """
+        with self._lock:
+            loaded_at, users = self._users.get(key, (None, None))
+            if loaded_at is not None and time.monotonic() - loaded_at < ttl:
+                return users
+            generation = self.generation
+        # Query the database without holding the lock
+        users = loader()
+        with self._lock:
+            # Do not store values loaded before an invalidation
+            if ttl > 0 and generation == self.generation:
+                self._users[key] = (time.monotonic(), users)
+
+        return users
+
+    def invalidate(self) -> None:
+        """Drop cached values (call it every time privileges change)."""
+        with self._lock:
+            self._users.clear()
+            self.generation += 1
+        log.debug("privileged users cache invalidated")
+
+
+privileged_users_cache: PrivilegedUsersCache = PrivilegedUsersCache()
+"""Privileged users cache shared by all sessions of this process."""
+
+
+# GUEST PASSWORD CACHE --------------------------------------------------------
+class GuestPasswordCache:
+    """Process-wide cache of the decrypted guest user password.
+
+    The guest password is shown to every new session, so it is kept in memory
+    and the database is checked at most once every TTL seconds. The check
+    compares the encrypted password stored in `credentials` table with the
+    cached one (a new encrypted value is stored for every password change),
+    so that changes made by other processes are detected without decrypting
+    the password again. Changes made by this process invalidate the cache
+    immediately (see `invalidate`).
+    """
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        """Lock used to protect cached values."""
+        self._passwords: dict[Any, tuple[float, str | None, str]] = {}
+        """Cached passwords (keys are engines, values are check time,
+        encrypted password and decrypted password)."""
+        self.generation: int = 0
+        """Counter increased by every invalidation."""
+
+    def get(self, key: Any, ttl: float) -> str | None:
+        """Return the cached password if it was checked less than TTL seconds ago.
+
+        Args:
+            key (Any): cache key (the engine of the database).
+            ttl (float): time to live (seconds).
+
+        Returns:
+            str | None: guest password or `None` if missing or expired.
+        """
+        with self._lock:
+            checked_at, _, password = self._passwords.get(
+                key, (None, None, None)
+            )
+            if checked_at is not None and time.monotonic() - checked_at < ttl:
+                return password
+
+        return None
+
+    def get_by_token(self, key: Any, encrypted_password: str) -> str | None:
+        """Return the cached password if the encrypted password is unchanged.
+
+        The check time is updated, so that the database is not checked again
+        for the next TTL seconds.
+
+        Args:
+            key (Any): cache key (the engine of the database).
+            encrypted_password (str): encrypted password read from database.
+
+        Returns:
+            str | None: guest password or `None` if missing or changed.
+        """
+        with self._lock:
+            _, cached_encrypted_password, password = self._passwords.get(
+                key, (None, None, None)
+            )
+            if (
+                password is None
+                or cached_encrypted_password != encrypted_password
+            ):
+                return None
+            self._passwords[key] = (
+                time.monotonic(),
+                encrypted_password,
+                password,
+            )
+
+        return password
+
+    def set(
+        self,
+        key: Any,
+        encrypted_password: str | None,
+        password: str,
+        generation: int,
+    ) -> None:
+        """Store the guest password.
+
+        Args:
+            key (Any): cache key (the engine of the database).
+            encrypted_password (str | None): encrypted password read from
+                database (`None` if unknown, the password is decrypted again
+                at the next check).
+            password (str): decrypted password.
+            generation (int): value of `generation` before the password was
+                loaded (values loaded before an invalidation are not stored).
+        """
+        with self._lock:
+            if generation == self.generation:
+                self._passwords[key] = (
+                    time.monotonic(),
+                    encrypted_password,
+                    password,
+                )
+
+    def invalidate(self) -> None:
+        """Drop cached values (call it every time the guest password changes)."""
+        with self._lock:
+            self._passwords.clear()
+            self.generation += 1
+        log.debug("guest password cache invalidated")
+
+
+guest_password_cache: GuestPasswordCache = GuestPasswordCache()
+"""Guest password cache shared by all sessions of this process."""
+
+
+# LOGIN THROTTLING ------------------------------------------------------------
+_LOGIN_THROTTLES: dict[int, LoginThrottle | None] = {}
+"""Login throttles (keys are PIDs, so that forked processes do not share the
+same buckets)."""
+_login_throttles_lock: threading.Lock = threading.Lock()
+"""Lock used to create a single login throttle."""
+
+
+def get_login_throttle(config: DictConfig) -> LoginThrottle | None:
+    """Return the login throttle shared by all requests of the current process.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+
+    Returns:
+        LoginThrottle | None: login throttle (`None` if throttling is disabled).
+    """
+    with _login_throttles_lock:
+        if os.getpid() not in _LOGIN_THROTTLES:
+            throttling_config = config.basic_auth.login_throttling
+            _LOGIN_THROTTLES[os.getpid()] = (
+                LoginThrottle(config=config)
+                if throttling_config.enabled
+                else None
+            )
+
+    return _LOGIN_THROTTLES[os.getpid()]
+
+
 # PROPERTIES ------------------------------------------------------------------
 # Intentionally left void
 
@@ -85,11 +325,14 @@ class DataLunchLoginHandler(RequestHandler):
         html = self._login_template.render(errormessage=errormessage)
         self.write(html)
 
-    def _validate(self, user: str, password: str) -> bool:
+    async def _validate(self, user: str, password: str) -> bool:
         """Validate user.
 
         Automatically update the password hash if it was generated by an old hashing protocol.
 
+        Password hashes are slow by design, so the check runs in a bounded
+        thread pool (see `get_hash_executor`) without blocking the event loop.
+
         Args:
             user (str): username.
             password (str): password (not hashed).
@@ -98,27 +341,43 @@ class DataLunchLoginHandler(RequestHandler):
             bool: user authentication flag (`True` if authenticated)
         """
         auth_user = AuthUser(config=self.config, name=user)
-        password_hash = auth_user.password_hash
-        # If password_hash is None the user does not exist
-        # If password_hash is not None check if the password matches
-        # the stored hash
-        if password_hash is not None:
-            if password_hash == password:
-                # Check if hash needs update
-                valid, new_hash = password_hash.verify_and_update(password)
-                if valid and new_hash:
-                    # Update to new hash
-                    auth_user.add_user_hashed_password(password)
-                # Return the OK value
-                return True
-        # Return the NOT OK value
-        return False
+        loop = asyncio.get_running_loop()
 
-    def post(self) -> None:
-        """Validate user and set the current user if valid."""
+        return await loop.run_in_executor(
+            get_hash_executor(self.config),
+            auth_user.verify_password,
+            password,
+        )
+
+    async def post(self) -> None:
+        """Validate user and set the current user if valid.
+
+        Login attempts are throttled (see `LoginThrottle`): excess attempts
+        are rejected before the password hash is computed.
+        """
         username = self.get_argument("username", "")
         password = self.get_argument("password", "")
-        auth = self._validate(username, password)
+        login_throttle = get_login_throttle(self.config)
+        if login_throttle is not None:
+            if login_throttle.shared:
+                # Shared buckets are stored in the database
+                allowed = await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    login_throttle.allow,
+                    username,
+                    self.request.remote_ip,
+                )
+            else:
+                allowed = login_throttle.allow(
+                    username, self.request.remote_ip
+                )
+            if not allowed:
+                error_msg = "?error=" + tornado.escape.url_escape(
+                    "Too many login attempts, retry later!"
+                )
+                self.redirect("/login" + error_msg)
+                return
+        auth = await self._validate(username, password)
         if auth:
             self.set_current_user(username)
             next_url = pn.state.base_url
@@ -198,6 +457,230 @@ class DataLunchProvider(OAuthProvider):
         return DataLunchLoginHandler
 
 
+class TokenBucketLimiter:
+    """In-memory token bucket rate limiter.
+
+    Each key (e.g. a username) has a bucket with up to `capacity` tokens,
+    refilled at a constant rate. An attempt takes a token and it is rejected
+    if the bucket is empty.
+
+    Memory is bounded: when there are more than `max_keys` buckets, full
+    buckets (equivalent to missing ones) and then the least recently used
+    buckets are dropped.
+
+    Args:
+        capacity (float): maximum number of tokens (burst size).
+        refill_per_minute (float): tokens added every minute.
+        max_keys (int, optional): maximum number of buckets kept in memory.
+            Defaults to 10000.
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_minute: float,
+        max_keys: int = 10000,
+    ) -> None:
+        self.capacity: float = capacity
+        """Maximum number of tokens."""
+        self.refill_rate: float = refill_per_minute / 60
+        """Tokens added every second."""
+        self.max_keys: int = max_keys
+        """Maximum number of buckets kept in memory."""
+        self._lock: threading.Lock = threading.Lock()
+        """Lock used to protect buckets."""
+        self._buckets: dict[str, tuple[float, float]] = {}
+        """Buckets (values are available tokens and last update time)."""
+
+    def _refill(self, tokens: float, updated_at: float, now: float) -> float:
+        """Return the tokens available after refilling a bucket.
+
+        Args:
+            tokens (float): tokens at the last update.
+            updated_at (float): last update (UNIX timestamp).
+            now (float): current time (UNIX timestamp).
+
+        Returns:
+            float: available tokens.
+        """
+        return min(
+            self.capacity,
+            tokens + max(now - updated_at, 0) * self.refill_rate,
+        )
+
+    def consume(self, key: str) -> bool:
+        """Take a token from the bucket of the given key.
+
+        Args:
+            key (str): bucket key.
+
+        Returns:
+            bool: `True` if a token was available (the attempt is allowed).
+        """
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = self._refill(tokens, updated_at, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Reinsert the key, so that buckets are sorted by last use
+            self._buckets.pop(key, None)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+
+        return allowed
+
+    def _prune(self, now: float) -> None:
+        """Drop full buckets, then the least recently used ones, until the
+        number of buckets is within `max_keys`.
+
+        Args:
+            now (float): current time (UNIX timestamp).
+        """
+        self._buckets = {
+            key: (tokens, updated_at)
+            for key, (tokens, updated_at) in self._buckets.items()
+            if self._refill(tokens, updated_at, now) < self.capacity
+        }
+        for key in list(self._buckets)[: len(self._buckets) - self.max_keys]:
+            del self._buckets[key]
+
+
+class DatabaseTokenBucketLimiter(TokenBucketLimiter):
+    """Token bucket rate limiter with buckets stored in the database
+    (`login_buckets` table), so that limits are shared between processes.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+        capacity (float): maximum number of tokens (burst size).
+        refill_per_minute (float): tokens added every minute.
+        max_retries (int, optional): retries if the bucket is created
+            concurrently by another process. Defaults to 3.
+    """
+
+    def __init__(
+        self,
+        config: DictConfig,
+        capacity: float,
+        refill_per_minute: float,
+        max_retries: int = 3,
+    ) -> None:
+        super().__init__(
+            capacity=capacity, refill_per_minute=refill_per_minute
+        )
+        self.database_connector: models.DatabaseConnector = (
+            models.DatabaseConnector(config=config)
+        )
+        """Object that handles database connection and operations"""
+        self.max_retries: int = max_retries
+        """Retries if the bucket is created concurrently by another process."""
+
+    def consume(self, key: str) -> bool:
+        """Take a token from the bucket of the given key.
+
+        The bucket row is locked while it is updated (on Postgresql).
+        If the bucket is created at the same time by another process the
+        update is retried (up to `max_retries` times), then the attempt is
+        rejected.
+
+        Args:
+            key (str): bucket key.
+
+        Returns:
+            bool: `True` if a token was available (the attempt is allowed).
+        """
+        key = key[:150]
+        for _ in range(self.max_retries + 1):
+            now = time.time()
+            with self.database_connector.session_scope() as session:
+                bucket = session.get(
+                    models.LoginBuckets, key, with_for_update=True
+                )
+                if bucket is None:
+                    # Drop full buckets (equivalent to missing ones)
+                    session.execute(
+                        delete(models.LoginBuckets).where(
+                            models.LoginBuckets.updated_at
+                            < now - self.capacity / self.refill_rate
+                        )
+                    )
+                    bucket = models.LoginBuckets(
+                        id=key, tokens=self.capacity, updated_at=now
+                    )
+                    session.add(bucket)
+                tokens = self._refill(bucket.tokens, bucket.updated_at, now)
+                allowed = tokens >= 1
+                bucket.tokens = tokens - 1 if allowed else tokens
+                bucket.updated_at = now
+                try:
+                    session.commit()
+                except IntegrityError:
+                    # The same bucket was created by another process: retry
+                    session.rollback()
+                    continue
+
+            return allowed
+
+        # Fail closed
+        log.warning(f"login bucket '{key}' not updated, attempt rejected")
+
+        return False
+
+
+class LoginThrottle:
+    """Throttle login attempts with a token bucket for each username and one
+    for each IP address.
+
+    Limits are set by `basic_auth.login_throttling`.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+    """
+
+    def __init__(self, config: DictConfig) -> None:
+        throttling_config = config.basic_auth.login_throttling
+        self.shared: bool = throttling_config.shared
+        """`True` if buckets are shared between processes (through the database)."""
+        limiter_kwargs = {"config": config} if self.shared else {}
+        limiter_class = (
+            DatabaseTokenBucketLimiter if self.shared else TokenBucketLimiter
+        )
+        self.username_limiter: TokenBucketLimiter = limiter_class(
+            capacity=throttling_config.username.capacity,
+            refill_per_minute=throttling_config.username.refill_per_minute,
+            **limiter_kwargs,
+        )
+        """Limiter for usernames."""
+        self.ip_limiter: TokenBucketLimiter = limiter_class(
+            capacity=throttling_config.ip.capacity,
+            refill_per_minute=throttling_config.ip.refill_per_minute,
+            **limiter_kwargs,
+        )
+        """Limiter for IP addresses."""
+
+    def allow(self, username: str, ip: str | None) -> bool:
+        """Check if a login attempt is allowed (a token is taken from both
+        buckets).
+
+        Args:
+            username (str): username.
+            ip (str | None): client IP address.
+
+        Returns:
+            bool: `True` if the attempt is allowed.
+        """
+        allowed_username = self.username_limiter.consume(f"user:{username}")
+        allowed_ip = self.ip_limiter.consume(f"ip:{ip}")
+        if not (allowed_username and allowed_ip):
+            log.warning(
+                f"login attempt throttled (user '{username}', ip {ip})"
+            )
+
+        return allowed_username and allowed_ip
+
+
 class PasswordHash:
     """Class that store the hashed value of a password.
 
@@ -486,21 +969,49 @@ class AuthContext:
                 "missing explicit authentication expiry date for cookies, defaults to 1 day"
             )
 
-    def list_privileged_users(self) -> list[str]:
-        """List only privileged users (from `privileged_users` table).
+    def get_privileged_users(
+        self, session: Session | None = None
+    ) -> dict[str, bool]:
+        """Return privileged users (from `privileged_users` table) with their admin flag.
+
+        Values are cached for `auth.privileged_users_cache_ttl` seconds (see `PrivilegedUsersCache`).
+
+        Args:
+            session (Session | None, optional): SQLAlchemy session to reuse if
+                the table is queried. If `None` a new session is created.
+                Defaults to None.
 
         Returns:
-            list[str]: list of usernames.
+            dict[str, bool]: usernames (keys) and admin flags (values).
         """
-        session = self.database_connector.create_session()
 
-        with session:
-            privileged_users = session.scalars(
-                select(models.PrivilegedUsers)
-            ).all()
+        def _load_privileged_users() -> dict[str, bool]:
+            with self.database_connector.session_scope(session) as s:
+                privileged_users = s.scalars(
+                    select(models.PrivilegedUsers)
+                ).all()
+            return {u.user: u.admin for u in privileged_users}
+
+        return privileged_users_cache.get(
+            key=self.database_connector.create_engine(),
+            ttl=self.config.auth.get("privileged_users_cache_ttl", 0),
+            loader=_load_privileged_users,
+        )
+
+    def list_privileged_users(
+        self, session: Session | None = None
+    ) -> list[str]:
+        """List only privileged users (from `privileged_users` table).
+
+        Args:
+            session (Session | None, optional): SQLAlchemy session to reuse.
+                If `None` a new session is created. Defaults to None.
 
+        Returns:
+            list[str]: list of usernames.
+        """
         # Return users
-        users_list = [u.user for u in privileged_users]
+        users_list = list(self.get_privileged_users(session=session))
         users_list.sort()
 
         return users_list
@@ -592,6 +1103,9 @@ class AuthContext:
         and uploaded to database. Otherwise the existing password is queried from database
         `credentials` table.
 
+        The password is cached for `basic_auth.guest_password_cache_ttl` seconds
+        (see `GuestPasswordCache`), so that new sessions do not query the database.
+
         Returns:
             str: guest user password or empty string if basic authentication is not active.
         """
@@ -607,6 +1121,15 @@ class AuthContext:
 
         # Set the guest password variable
         if is_guest_user_active:
+            # Return the cached password if it was checked recently
+            cache_key = self.database_connector.create_engine()
+            guest_password = guest_password_cache.get(
+                key=cache_key,
+                ttl=self.config.basic_auth.get("guest_password_cache_ttl", 0),
+            )
+            if guest_password is not None:
+                return guest_password
+            generation = guest_password_cache.generation
             # If flag for resetting the password does not exist use the default
             # value
             if (
@@ -640,14 +1163,34 @@ class AuthContext:
                 AuthUser(
                     config=self.config, auth_context=self, name="guest"
                 ).add_user_hashed_password(guest_password)
+                # The encrypted value is not known, it is read at the next check
+                guest_password_cache.set(
+                    key=cache_key,
+                    encrypted_password=None,
+                    password=guest_password,
+                    generation=guest_password_cache.generation,
+                )
             else:
                 # Load from database
                 session = self.database_connector.create_session()
                 with session:
                     try:
-                        guest_password = session.get(
+                        password_encrypted = session.get(
                             models.Credentials, "guest"
-                        ).password_encrypted.decrypt()
+                        ).password_encrypted
+                        # Decrypt only if the password changed
+                        guest_password = guest_password_cache.get_by_token(
+                            key=cache_key,
+                            encrypted_password=password_encrypted.encrypted_password,
+                        )
+                        if guest_password is None:
+                            guest_password = password_encrypted.decrypt()
+                            guest_password_cache.set(
+                                key=cache_key,
+                                encrypted_password=password_encrypted.encrypted_password,
+                                password=guest_password,
+                                generation=generation,
+                            )
                     except InvalidToken:
                         # Notify exception and suggest to reset guest user password
                         guest_password = ""
@@ -808,9 +1351,63 @@ class AuthContext:
         return False
 
 
+class AuthUserProfile:
+    """User data used to set up the graphic interface, loaded with a single
+    query (see `AuthUser.get_profile`).
+
+    Args:
+        is_privileged (bool): `True` if the user is listed inside the `privileged_users` table.
+        is_admin (bool): admin flag.
+        guest_override (bool): guest override flag (from `flags` table).
+        has_birthday (bool): `True` if the user has birthday data.
+        has_credentials (bool): `True` if the user has credentials (basic authentication).
+        generation (int, optional): privileged users cache generation when
+            the profile was loaded (see `PrivilegedUsersCache`). Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        is_privileged: bool,
+        is_admin: bool,
+        guest_override: bool,
+        has_birthday: bool,
+        has_credentials: bool,
+        generation: int = 0,
+    ) -> None:
+        self.is_privileged: bool = is_privileged
+        """`True` if the user is listed inside the `privileged_users` table."""
+        self.is_admin: bool = is_admin
+        """Admin flag."""
+        self.guest_override: bool = guest_override
+        """Guest override flag."""
+        self.has_birthday: bool = has_birthday
+        """`True` if the user has birthday data."""
+        self.has_credentials: bool = has_credentials
+        """`True` if the user has credentials."""
+        self.generation: int = generation
+        """Privileged users cache generation when the profile was loaded."""
+
+    def __repr__(self) -> str:
+        """Simple object representation.
+
+        Returns:
+            str: string representation.
+        """
+        return (
+            f"<AUTH_USER_PROFILE:privileged={self.is_privileged}"
+            f",admin={self.is_admin},guest_override={self.guest_override}"
+            f",birthday={self.has_birthday}"
+            f",credentials={self.has_credentials}>"
+        )
+
+
 class AuthUser:
     """Class to handle user authentication and management.
 
+    User data used by the graphic interface (privileges, guest override flag,
+    birthday and credentials existence) are loaded with a single query and
+    kept for the lifetime of the object (see `get_profile`).
+
     Args:
         config (DictConfig): Hydra configuration dictionary.
         name (str | None, optional): username. Defaults to None.
@@ -827,6 +1424,8 @@ class AuthUser:
         self.auth_context = auth_context or AuthContext(config)
         # Take username from Panel state if not provided
         self.name = name or self.get_user_from_panel_state()
+        self._profile: AuthUserProfile | None = None
+        """Cached user profile (see `get_profile`)."""
 
     def get_user_from_panel_state(self) -> str:
         """Return the user from Panel state object.
@@ -844,11 +1443,92 @@ class AuthUser:
                 user = user.split("@")[0]
         return user
 
-    def is_guest(self, allow_override: bool = True) -> bool:
+    def get_profile(
+        self, refresh: bool = False, session: Session | None = None
+    ) -> AuthUserProfile:
+        """Return the user profile, query the database only if it is missing.
+
+        The profile is reloaded if privileges changed in this process (see
+        `PrivilegedUsersCache.invalidate`) or if `refresh` is `True` (use it
+        after changing the guest override flag or birthday data).
+
+        Args:
+            refresh (bool, optional): reload the profile from the database. Defaults to False.
+            session (Session | None, optional): SQLAlchemy session to reuse.
+                If `None` a new session is created. Defaults to None.
+
+        Returns:
+            AuthUserProfile: user profile.
+        """
+        profile = self._profile
+        if (
+            refresh
+            or profile is None
+            or profile.generation != privileged_users_cache.generation
+        ):
+            profile = self._load_profile(session=session)
+            self._profile = profile
+
+        return profile
+
+    def _load_profile(self, session: Session | None = None) -> AuthUserProfile:
+        """Query the database to build the user profile.
+
+        Privileges, guest override flag, birthday and credentials are read
+        with a single statement (one scalar subquery for each table).
+
+        Args:
+            session (Session | None, optional): SQLAlchemy session to reuse.
+                If `None` a new session is created. Defaults to None.
+
+        Returns:
+            AuthUserProfile: user profile.
+        """
+        # Read the generation before the query, so that a profile loaded
+        # during an invalidation is reloaded at the next call
+        generation = privileged_users_cache.generation
+        statement = select(
+            select(models.PrivilegedUsers.admin)
+            .where(models.PrivilegedUsers.user == self.name)
+            .scalar_subquery()
+            .label("admin"),
+            select(models.Flags.value)
+            .where(models.Flags.id == f"{self.name}_guest_override")
+            .scalar_subquery()
+            .label("guest_override"),
+            select(models.Birthdays.user)
+            .where(models.Birthdays.user == self.name)
+            .exists()
+            .label("has_birthday"),
+            select(models.Credentials.user)
+            .where(models.Credentials.user == self.name)
+            .exists()
+            .label("has_credentials"),
+        )
+        with self.auth_context.database_connector.session_scope(session) as s:
+            row = s.execute(statement).one()
+
+        profile = AuthUserProfile(
+            is_privileged=row.admin is not None,
+            is_admin=bool(row.admin),
+            guest_override=bool(row.guest_override),
+            has_birthday=bool(row.has_birthday),
+            has_credentials=bool(row.has_credentials),
+            generation=generation,
+        )
+        log.debug(f"user profile loaded for {self.name}: {profile}")
+
+        return profile
+
+    def is_guest(
+        self, allow_override: bool = True, session: Session | None = None
+    ) -> bool:
         """Check if a user is a guest by checking if it is listed inside the `privileged_users` table.
 
         Args:
             allow_override (bool, optional): override enablement flag. Defaults to True.
+            session (Session | None, optional): SQLAlchemy session to reuse.
+                If `None` a new session is created. Defaults to None.
 
         Returns:
             bool: guest flag. `True` if the user is a guest.
@@ -857,40 +1537,32 @@ class AuthUser:
         if not self.auth_context.is_auth_active():
             return False
 
-        # Load guest override from flag table (if the button is pressed its value
-        # is True). If not available use False.
-        guest_override = self.auth_context.database_connector.get_flag(
-            id=f"{self.name}_guest_override",
-            value_if_missing=False,
-        )
+        # Guest override comes from flag table (if the button is pressed its
+        # value is True, if not available it is False)
+        profile = self.get_profile(session=session)
 
         # If guest override is active always return true (user act like guest)
-        if guest_override and allow_override:
+        if profile.guest_override and allow_override:
             return True
 
         # Otherwise check if user is not included in privileged users
-        privileged_users = self.auth_context.list_privileged_users()
+        return not profile.is_privileged
 
-        return self.name not in privileged_users
-
-    def is_admin(self) -> bool:
+    def is_admin(self, session: Session | None = None) -> bool:
         """Check if a user is an admin by checking the `privileged_users` table.
 
+        Args:
+            session (Session | None, optional): SQLAlchemy session to reuse.
+                If `None` a new session is created. Defaults to None.
+
         Returns:
             bool: admin flag. `True` if the user is an admin.
         """
         # If authorization is not active always return false (ther is no admin)
         if not self.auth_context.is_auth_active():
             return False
-        session = self.auth_context.database_connector.create_session()
-        with session:
-            admin_users = session.scalars(
-                select(models.PrivilegedUsers).where(
-                    models.PrivilegedUsers.admin == sql_true()
-                )
-            ).all()
 
-        return self.name in [u.user for u in admin_users]
+        return self.get_profile(session=session).is_admin
 
     @property
     def password_hash(self) -> PasswordHash | None:
@@ -905,6 +1577,33 @@ class AuthUser:
             user_credential = session.get(models.Credentials, self.name)
         return user_credential.password_hash if user_credential else None
 
+    def verify_password(self, password: str) -> bool:
+        """Check the user password against the hash stored in `credentials` table.
+
+        Automatically update the password hash if it was generated by an old hashing protocol.
+
+        This function is blocking (password hashes are slow by design): call it
+        from an executor inside asynchronous code.
+
+        Args:
+            password (str): password (not hashed).
+
+        Returns:
+            bool: `True` if the user exists and the password matches.
+        """
+        password_hash = self.password_hash
+        # If password_hash is None the user does not exist
+        if password_hash is None or not isinstance(password, str):
+            return False
+        # Check the password and if the hash needs an update (a single hash
+        # computation)
+        valid, new_hash = password_hash.verify_and_update(password)
+        if valid and new_hash:
+            # Update to new hash
+            self.add_user_hashed_password(password)
+
+        return valid
+
     def add_privileged_user(self, is_admin: bool) -> None:
         """Add user id to `privileged_users` table.
 
@@ -924,6 +1623,7 @@ class AuthUser:
             new_record=new_privileged_user,
         )
         session.commit()
+        privileged_users_cache.invalidate()
 
     def add_user_hashed_password(self, password: str) -> None:
         """Add user credentials to `credentials` table.
@@ -955,6 +1655,8 @@ class AuthUser:
             new_record=new_user_credential,
         )
         session.commit()
+        if self.name == "guest":
+            guest_password_cache.invalidate()
 
     def remove_user(self) -> dict:
         """Remove user from the database.
@@ -981,6 +1683,9 @@ class AuthUser:
                 )
             )
             session.commit()
+        privileged_users_cache.invalidate()
+        if self.name == "guest":
+            guest_password_cache.invalidate()
 
         return {
             "privileged_users_deleted": privileged_users_deleted.rowcount,
@@ -991,17 +1696,50 @@ class AuthUser:
 class AuthCallback:
     """Class to handle authorization callback.
 
+    Authorization decisions depend only on the user and on the class of the
+    target path (main page or other pages), so they are cached for a short
+    time (`cache_ttl`). Cached decisions are dropped when privileges change
+    (see `PrivilegedUsersCache.invalidate`).
+
     Args:
         config (DictConfig): Hydra configuration dictionary.
         authorize_guest_users (bool, optional): Set to `True` to enable the main page to guest users.
             Defaults to `False`.
+        cache_ttl (float, optional): seconds authorization decisions are cached
+            (set to 0 to disable the cache). Defaults to 0.
+        cache_max_entries (int, optional): maximum number of cached decisions.
+            Defaults to 10000.
     """
 
     def __init__(
-        self, config: DictConfig, authorize_guest_users: bool = False
+        self,
+        config: DictConfig,
+        authorize_guest_users: bool = False,
+        cache_ttl: float = 0,
+        cache_max_entries: int = 10000,
     ) -> None:
         self.config = config
         self.authorize_guest_users = authorize_guest_users
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        # Authentication context shared by all requests
+        self.auth_context = AuthContext(config)
+        # Cached decisions (keys are usernames and path classes, values are
+        # expiry time, privileged users cache generation and decision)
+        self._decisions_lock = threading.Lock()
+        self._decisions: dict[tuple[str, str], tuple[float, int, bool]] = {}
+
+    @staticmethod
+    def get_path_class(target_path: str) -> str:
+        """Return the class of the target path (decisions depend only on it).
+
+        Args:
+            target_path (str): path of the requested resource.
+
+        Returns:
+            str: `main` for the main page, `other` for any other resource.
+        """
+        return "main" if target_path == "/" else "other"
 
     def authorize(self, user_info: dict, target_path: str) -> bool:
         """Authorization callback: read config, user info and the target path of the
@@ -1017,19 +1755,60 @@ class AuthCallback:
         Returns:
             bool: authorization flag. `True` if authorized.
         """
-        # Set authenticated user from panel state (authentication context is
-        # instantiated automatically)
-        auth_user = AuthUser(config=self.config)
         # If authorization is not active authorize every user
-        if not auth_user.auth_context.is_auth_active():
+        if not self.auth_context.is_auth_active():
             return True
-        # Get privileged users
-        privileged_users = auth_user.auth_context.list_privileged_users()
+        # Set authenticated user from panel state
+        auth_user = AuthUser(
+            config=self.config, auth_context=self.auth_context
+        )
         log.debug(f"target path: {target_path}")
         # If user is not authenticated block it
         if not auth_user.name:
             log.debug("user not authenticated")
             return False
+
+        # Check cached decisions
+        key = (auth_user.name, self.get_path_class(target_path))
+        generation = privileged_users_cache.generation
+        with self._decisions_lock:
+            expires_at, decision_generation, authorized = self._decisions.get(
+                key, (0, None, None)
+            )
+        if time.monotonic() < expires_at and decision_generation == generation:
+            return authorized
+
+        authorized = self._authorize_user(auth_user, target_path)
+        if self.cache_ttl > 0:
+            now = time.monotonic()
+            with self._decisions_lock:
+                if len(self._decisions) >= self.cache_max_entries:
+                    # Drop expired decisions (or all of them, if none is expired)
+                    self._decisions = {
+                        k: v for k, v in self._decisions.items() if v[0] > now
+                    }
+                    if len(self._decisions) >= self.cache_max_entries:
+                        self._decisions.clear()
+                self._decisions[key] = (
+                    now + self.cache_ttl,
+                    generation,
+                    authorized,
+                )
+
+        return authorized
+
+    def _authorize_user(self, auth_user: AuthUser, target_path: str) -> bool:
+        """Check if an authenticated user can reach the target path.
+
+        Args:
+            auth_user (AuthUser): authenticated user.
+            target_path (str): path of the requested resource.
+
+        Returns:
+            bool: authorization flag. `True` if authorized.
+        """
+        # Get privileged users
+        privileged_users = self.auth_context.get_privileged_users()
         # All privileged users can reach backend (but the backend will have
         # controls only for admins)
         if auth_user.name in privileged_users:
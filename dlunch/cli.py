@@ -7,9 +7,12 @@ Call `data-lunch --help` from the terminal inside an environment where the
 """
 
 import click
+import hydra
 from importlib.metadata import version
+import itertools
 import pandas as pd
 import subprocess
+from sqlalchemy import Date
 
 from hydra import compose, initialize
 
@@ -19,9 +22,15 @@ from .models import Data, metadata_obj, CommonTable
 # Waiter Imports
 from .core import Waiter
 
+# File formats imports
+from . import formats
+
 # Auth imports
 from . import auth
 
+# State imports
+from . import state
+
 # Version
 __version__: str = version("dlunch")
 """Data-Lunch command line version."""
@@ -63,6 +72,11 @@ def cli(ctx, hydra_overrides: tuple | None):
     # Auth encryption
     auth_context.set_app_auth_and_encryption()
 
+    # Share changes with running app processes (no listener required)
+    state.set_notifier(
+        hydra.utils.instantiate(config.db.notifier, config), listen=False
+    )
+
 
 @cli.group()
 @click.pass_obj
@@ -237,6 +251,8 @@ def delete_database(obj):
     try:
         engine = waiter.database_connector.create_engine()
         Data.metadata.drop_all(engine)
+        # Running apps shall rebuild their lunch snapshot
+        state.notify_change(topic="database")
         click.secho("Database deleted", fg="green")
     except Exception as e:
         # Generic error
@@ -278,6 +294,8 @@ def delete_table(obj, name):
     try:
         engine = waiter.database_connector.create_engine()
         metadata_obj.tables[name].drop(engine)
+        # Running apps shall rebuild their lunch snapshot
+        state.notify_change(topic=name)
         click.secho(f"Table '{name}' deleted", fg="green")
     except Exception as e:
         # Generic error
@@ -287,23 +305,37 @@ def delete_table(obj, name):
 
 @table.command("export")
 @click.argument("name")
-@click.argument("csv_file_path")
+@click.argument("file_path")
 @click.option(
     "--index/--no-index",
     "index",
     show_default=True,
     default=False,
-    help="select if index column is exported to csv",
+    help="select if index column is exported to file",
+)
+@click.option(
+    "-s",
+    "--chunksize",
+    "chunksize",
+    type=click.IntRange(min=1),
+    default=None,
+    help="stream the table and write the file in chunks with this number of rows (by default the whole table is loaded in memory)",
 )
 @click.pass_obj
-def export_table_to_csv(obj, name, csv_file_path, index):
-    """Export a single table to a csv file."""
+def export_table(obj, name, file_path, index, chunksize):
+    """Export a single table to a csv, parquet or arrow file.
+
+    The file format is selected by FILE_PATH extension (.csv, .parquet,
+    .arrow or .feather). Parquet and arrow files keep columns types.
+    """
 
-    click.secho(f"Export table '{name}' to CSV {csv_file_path}\n", fg="yellow")
+    click.secho(f"Export table '{name}' to {file_path}\n", fg="yellow")
 
     # Instantiate model
     model = None
     try:
+        file_format = formats.get_file_format(file_path)
+
         # Find model
         for mapper in Data.registry.mappers:
             if mapper.class_.__tablename__ == name:
@@ -314,8 +346,18 @@ def export_table_to_csv(obj, name, csv_file_path, index):
         if model is None:
             raise Exception(f"Table '{name}' not found")
 
-        # Create dataframe
-        df = model.read_as_df(obj["config"])
+        # Create dataframes (a single dataframe if chunksize is not set)
+        if chunksize is None:
+            chunks = iter([model.read_as_df(obj["config"])])
+        else:
+            chunks = model.read_as_df_chunks(
+                obj["config"], chunksize=chunksize
+            )
+        # Empty tables may return no chunk
+        df = next(
+            chunks,
+            pd.DataFrame(columns=[c.name for c in model.__table__.columns]),
+        )
 
     except Exception as e:
         # Generic error
@@ -332,20 +374,41 @@ def export_table_to_csv(obj, name, csv_file_path, index):
         )
 
         # Export table
+        chunks = itertools.chain([df], chunks)
+        # Store date columns as dates (not datetimes) in columnar formats
+        if file_format != "csv":
+            date_columns = [
+                c.name
+                for c in model.__table__.columns
+                if isinstance(c.type, Date)
+            ]
+            chunks = (
+                formats.convert_date_columns(df, date_columns) for df in chunks
+            )
         try:
-            df.to_csv(csv_file_path, index=index)
+            # Columns types from the model (empty tables or columns do not
+            # tell them)
+            num_rows_written = formats.write_chunks(
+                chunks=chunks,
+                file_path=file_path,
+                file_format=file_format,
+                index=index,
+                column_types={
+                    c.name: c.type.python_type for c in model.__table__.columns
+                },
+            )
         except Exception as e:
             # Generic error
-            click.secho("Cannot write CSV", fg="red")
+            click.secho("Cannot write file", fg="red")
             click.secho(f"\n ===== EXCEPTION =====\n\n{e}", fg="red")
         else:
-            click.secho("Done", fg="green")
+            click.secho(f"Done ({num_rows_written} rows)", fg="green")
 
 
 @table.command("load")
 @click.confirmation_option()
 @click.argument("name")
-@click.argument("csv_file_path")
+@click.argument("file_path")
 @click.option(
     "--index/--no-index",
     "index",
@@ -359,16 +422,48 @@ def export_table_to_csv(obj, name, csv_file_path, index):
     "index_col",
     type=str,
     default=None,
-    help="select the column used as index in the csv file",
+    help="select the column used as index in the file",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    "batch_size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="rows written by each upsert statement (default from config.db.bulk_write.batch_size)",
+)
+@click.option(
+    "-s",
+    "--chunksize",
+    "chunksize",
+    type=click.IntRange(min=1),
+    default=None,
+    help="read the file in chunks with this number of rows, each chunk is committed separately (by default the whole file is loaded in memory)",
 )
 @click.pass_obj
-def load_table(obj, name, csv_file_path, index, index_col):
-    """Load a single table from a csv file."""
+def load_table(obj, name, file_path, index, index_col, batch_size, chunksize):
+    """Load a single table from a csv, parquet or arrow file.
+
+    The file format is selected by FILE_PATH extension (.csv, .parquet,
+    .arrow or .feather).
+    """
 
-    click.secho(f"Load CSV {csv_file_path} to table '{name}'", fg="yellow")
+    click.secho(f"Load {file_path} to table '{name}'", fg="yellow")
 
-    # Create dataframe
-    df = pd.read_csv(csv_file_path, index_col=index_col)
+    try:
+        # Create dataframes (a single dataframe if chunksize is not set)
+        chunks = formats.read_chunks(
+            file_path=file_path,
+            file_format=formats.get_file_format(file_path),
+            chunksize=chunksize,
+            index_col=index_col,
+        )
+        df = next(chunks, pd.DataFrame())
+    except Exception as e:
+        # Generic error
+        click.secho("Cannot read file", fg="red")
+        click.secho(f"\n ===== EXCEPTION =====\n\n{e}", fg="red")
+        return
 
     # Show head
     click.echo("First three rows of the table to upload\n")
@@ -392,16 +487,25 @@ def load_table(obj, name, csv_file_path, index, index_col):
         if model is None:
             raise Exception(f"Table '{name}' not found")
 
-        num_rows_written = model.write_from_df(
-            config=obj["config"],
-            df=df,
-            index=index,
-        )
+        # Write the first chunk, then the others
+        num_rows_written = 0
+        for df in itertools.chain([df], chunks):
+            num_rows_written += model.write_from_df(
+                config=obj["config"],
+                df=df,
+                index=index,
+                batch_size=batch_size,
+            )
         click.secho(f"\nUpload complete ({num_rows_written} rows)", fg="green")
     except Exception as e:
         # Generic error
         click.secho("Cannot load table", fg="red")
         click.secho(f"\n ===== EXCEPTION =====\n\n{e}", fg="red")
+    finally:
+        # Running apps shall rebuild their lunch snapshot (chunks committed
+        # before an error are already in the table)
+        if model is not None:
+            state.notify_change(topic=name)
 
 
 @cli.group()
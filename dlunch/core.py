@@ -5,6 +5,7 @@ manage Data-Lunch operations. The class is used to interact with the database
 and the Panel widgets.
 """
 
+import datetime as dt
 import logging
 import panel as pn
 import pandas as pd
@@ -13,20 +14,23 @@ import pathlib
 import random
 import socket
 import subprocess
+import xlsxwriter
 
 from omegaconf import DictConfig, OmegaConf
 from openpyxl.utils import get_column_interval
 from openpyxl.styles import Alignment, Font
 from bokeh.models.widgets.tables import CheckboxEditor
 from io import BytesIO
-from PIL import Image
-from pytesseract import pytesseract
 from sqlalchemy import func, select, delete, update
+from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import true as sql_true
 
 # Graphic interface imports (after class definition)
 from . import models
+from . import formats
+from . import ocr
 from . import gui
+from . import state
 from .auth import AuthUser
 
 # APP METADATA ----------------------------------------------------------------
@@ -46,15 +50,19 @@ class Waiter:
 
     Args:
         config (DictConfig| None): Hydra configuration object.
+        auth_user (AuthUser | None, optional): object with authenticated user
+            data, share it with the graphic interface so that the user profile
+            is loaded once per session. If `None` a new object is created.
+            Defaults to None.
 
     Raise:
         ValueError: when calling (unmangled) methods, if the configuration is not set.
     """
 
-    def __init__(self, config: DictConfig):
+    def __init__(self, config: DictConfig, auth_user: AuthUser | None = None):
         self.config: DictConfig = config
         """Hydra configuration object"""
-        self.auth_user: AuthUser = AuthUser(config=config)
+        self.auth_user: AuthUser = auth_user or AuthUser(config=config)
         """Object with authenticated user data and related methods"""
         self.database_connector: models.DatabaseConnector = (
             models.DatabaseConnector(config=config)
@@ -132,15 +140,20 @@ class Waiter:
         log.info("reset values in table 'flags'")
         # Clean cache
         pn.state.clear_caches()
+        state.notify_change(topic="menu")
         log.info("cache cleaned")
 
-    def build_menu(
+    async def build_menu(
         self,
         event: param.parameterized.Event,
         app: pn.Template,
         gi: gui.GraphicInterface,
     ) -> None:
-        """Read menu from file (Excel or image) and upload menu items to database `menu` table.
+        """Read menu from file (Excel, image or PDF) and upload menu items to database `menu` table.
+
+        Text is extracted from images and PDF files by a pool of worker processes (see the `ocr` module),
+        so that the event loop (and the other sessions) are not blocked while OCR runs.
+        A progress bar is shown in the meantime.
 
         Args:
             event (param.parameterized.Event): Panel button event.
@@ -162,68 +175,45 @@ class Waiter:
         # Load file from widget
         if gi.file_widget.value is not None:
             # Find file extension
-            file_ext = pathlib.PurePath(gi.file_widget.filename).suffix
+            file_ext = pathlib.PurePath(gi.file_widget.filename).suffix.lower()
 
             # Save file locally
             local_menu_filename = menu_filename + file_ext
             gi.file_widget.save(local_menu_filename)
 
-            # Clean tables
-            self.clean_tables()
-
-            # File can be either an excel file or an image
-            if file_ext == ".png" or file_ext == ".jpg" or file_ext == ".jpeg":
-                # Transform image into a pandas DataFrame
-                # Open image with PIL
-                img = Image.open(local_menu_filename)
-                # Extract text from image
-                text = pytesseract.image_to_string(img, lang="ita")
-                # Process rows (rows that are completely uppercase are section titles)
-                rows = [
-                    row
-                    for row in text.split("\n")
-                    if row and not row.isupper()
-                ]
-                df = pd.DataFrame({"item": rows})
-                # Concat additional items
-                df = pd.concat(
-                    [
-                        df,
-                        pd.DataFrame(
-                            {
-                                "item": [
-                                    item["name"]
-                                    for item in self.config.panel.additional_items_to_concat
-                                ]
-                            }
+            # File can be either an excel file, an image or a PDF file
+            if file_ext in ocr.IMAGE_EXTENSIONS or (
+                file_ext in ocr.PDF_EXTENSIONS and ocr.is_pdf_supported()
+            ):
+                log.info(f"{file_ext[1:]} file uploaded")
+                # Extract text in worker processes
+                gi.show_build_menu_progress(True)
+                try:
+                    rows = await ocr.read_menu_file(
+                        config=self.config,
+                        file_path=local_menu_filename,
+                        progress=lambda done, total: gi.show_build_menu_progress(
+                            True, value=done, max=total
                         ),
-                    ],
-                    axis="index",
-                )
+                    )
+                except Exception as e:
+                    pn.state.notifications.error(
+                        "Menu processing error",
+                        duration=self.config.panel.notifications.duration,
+                    )
+                    log.warning(f"OCR error: {e}")
+                    return
+                finally:
+                    gi.show_build_menu_progress(False)
+                # Transform rows into a pandas DataFrame
+                df = pd.DataFrame({"item": rows})
 
             elif file_ext == ".xlsx":
                 log.info("excel file uploaded")
                 df = pd.read_excel(
                     local_menu_filename, names=["item"], header=None
                 )
-                # Concat additional items
-                df = pd.concat(
-                    [
-                        df,
-                        pd.DataFrame(
-                            {
-                                "item": [
-                                    item["name"]
-                                    for item in self.config.panel.additional_items_to_concat
-                                ]
-                            }
-                        ),
-                    ],
-                    axis="index",
-                    ignore_index=True,
-                )
             else:
-                df = pd.DataFrame()
                 pn.state.notifications.error(
                     "Wrong file type",
                     duration=self.config.panel.notifications.duration,
@@ -231,6 +221,26 @@ class Waiter:
                 log.warning("wrong file type")
                 return
 
+            # Concat additional items
+            df = pd.concat(
+                [
+                    df,
+                    pd.DataFrame(
+                        {
+                            "item": [
+                                item["name"]
+                                for item in self.config.panel.additional_items_to_concat
+                            ]
+                        }
+                    ),
+                ],
+                axis="index",
+                ignore_index=True,
+            )
+
+            # Clean tables (once the new menu is ready)
+            self.clean_tables()
+
             # Upload to database menu table
             try:
                 num_rows_written = models.Menu.write_from_df(
@@ -238,6 +248,8 @@ class Waiter:
                     df=df.drop_duplicates(subset="item"),
                     index=False,
                 )
+                # Invalidate lunch data shared by all sessions and notify them
+                state.notify_change(topic="menu")
                 # Update dataframe widget
                 self.reload_menu(
                     None,
@@ -274,6 +286,7 @@ class Waiter:
         self,
         event: param.parameterized.Event,
         gi: gui.GraphicInterface,
+        keep_selections: bool = False,
     ) -> None:
         """Main core function that sync Panel widget with database tables.
 
@@ -286,41 +299,53 @@ class Waiter:
         At the end stats about lunches are calculated and loaded to database. Finally
         statistics (values and table) shown inside the app are updated accordingly.
 
+        All queries run inside the same session (a single unit of work), so
+        the content shown after a reload is consistent.
+
         Args:
             event (param.parameterized.Event): Panel button event.
             gi (gui.GraphicInterface): graphic interface object (used to interact with Panel widgets).
+            keep_selections (bool, optional): keep menu items selected (and
+                notes written) by the user but not sent yet. Used by live
+                updates triggered by other sessions. Defaults to False.
         """
 
         # Create session
         session = self.database_connector.create_session()
 
         with session:
+            # Get lunch data shared by all sessions (the database is queried
+            # only if tables changed since the last snapshot)
+            snapshot = state.lunch_state.get_snapshot(
+                builder=lambda version: self.build_lunch_snapshot(
+                    version=version, session=session
+                )
+            )
+
             # Check if someone changed the "no_more_order" toggle
-            if (
-                gi.toggle_no_more_order_button.value
-                != self.database_connector.get_flag(id="no_more_orders")
-            ):
+            if gi.toggle_no_more_order_button.value != snapshot.no_more_orders:
                 # The following statement will trigger the toggle callback
-                # which will call reload_menu once again
-                # This is the reason why this if contains a return (without the return
-                # the content will be reloaded twice)
-                gi.toggle_no_more_order_button.value = (
-                    self.database_connector.get_flag(id="no_more_orders")
-                )
+                # that updates the widgets it controls (the menu is not
+                # reloaded by the callback, since the value comes from the
+                # database, so that this reload can keep selections)
+                gi.toggle_no_more_order_button.value = snapshot.no_more_orders
 
-                return
+            # Load the user profile once for the whole reload (privileges,
+            # guest override and birthday are read with a single query)
+            profile = self.auth_user.get_profile(refresh=True, session=session)
 
             # Check guest override button status (if not in table use False)
-            gi.toggle_guest_override_button.value = (
-                self.database_connector.get_flag(
-                    id=f"{self.auth_user.name}_guest_override",
-                    value_if_missing=False,
-                )
+            gi.toggle_guest_override_button.value = profile.guest_override
+
+            # Evaluate user privileges once for the whole reload
+            is_guest = self.auth_user.is_guest(session=session)
+            is_guest_without_override = self.auth_user.is_guest(
+                allow_override=False, session=session
             )
 
             # Set no more orders toggle button and the change order time button
             # visibility and activation
-            if self.auth_user.is_guest(allow_override=False):
+            if is_guest_without_override:
                 # Deactivate the no_more_orders_button for guest users
                 gi.toggle_no_more_order_button.disabled = True
                 gi.toggle_no_more_order_button.visible = False
@@ -336,7 +361,7 @@ class Waiter:
                 gi.change_order_time_takeaway_button.visible = True
 
             # Guest graphic configuration
-            if self.auth_user.is_guest():
+            if is_guest:
                 # If guest show guest type selection group
                 gi.person_widget.widgets["guest"].disabled = False
                 gi.person_widget.widgets["guest"].visible = True
@@ -346,23 +371,20 @@ class Waiter:
                 gi.person_widget.widgets["guest"].visible = False
 
             # Birthday alert
-            if not self.database_connector.get_user_birthday(
-                username=self.auth_user.name
-            ) and not self.auth_user.is_guest(allow_override=False):
+            if not profile.has_birthday and not is_guest_without_override:
                 # If no birthday is set show alert
                 gi.missing_birthday_alert.visible = True
             else:
                 # If birthday is set hide alert
                 gi.missing_birthday_alert.visible = False
 
-            # Reload menu
-            df = models.Menu.read_as_df(
-                config=self.config,
-                index_col="id",
-            )
+            # Reload menu (copy the shared dataframe before changing it)
+            df = snapshot.menu.copy()
             # Add order (for selecting items) and note columns
             df["order"] = False
             df[self.config.panel.gui.note_column_name] = ""
+            if keep_selections:
+                df = self._keep_menu_selections(df, gi.dataframe.value)
             gi.dataframe.value = df
             gi.dataframe.formatters = {"order": {"type": "tickCross"}}
             gi.dataframe.editors = {
@@ -406,7 +428,7 @@ class Waiter:
             log.debug("menu reloaded")
 
             # Load results
-            df_dict = self.df_list_by_lunch_time()
+            df_dict = snapshot.orders
             # Clean columns and load text and dataframes
             gi.res_col.clear()
             gi.time_col.clear()
@@ -414,17 +436,8 @@ class Waiter:
                 # Titles
                 gi.res_col.append(self.config.panel.result_column_text)
                 gi.time_col.append(gi.time_col_title)
-                # Build guests list (one per each guest types)
-                guests_lists = {}
-                for guest_type in self.config.panel.guest_types:
-                    guests_lists[guest_type] = [
-                        user.id
-                        for user in session.scalars(
-                            select(models.Users).where(
-                                models.Users.guest == guest_type
-                            )
-                        ).all()
-                    ]
+                # Guests list (one per each guest types)
+                guests_lists = snapshot.guests_lists
                 # Loop through lunch times
                 for time, df in df_dict.items():
                     # Find the number of grumbling stomachs
@@ -516,7 +529,7 @@ class Waiter:
                     gi.res_col.append(pn.Spacer(height=5))
                     gi.res_col.append(
                         gi.build_order_table(
-                            df=df,
+                            df=df.copy(),
                             time=time,
                             guests_lists=guests_lists,
                         )
@@ -531,24 +544,12 @@ class Waiter:
             # Reload birthdays
             if (
                 self.config.panel.birthdays_notification.enabled
-                and not self.auth_user.is_guest(allow_override=False)
+                and not is_guest_without_override
             ):
                 # Clear birthdays column
                 gi.birthdays_col.clear()
-                # Get birthdays from database
-                df_birthdays = self.database_connector.read_sql_query(
-                    session=session,
-                    query=self.config.db.birthdays_query.format(
-                        schema=self.config.db.get("schema", models.SCHEMA)
-                    ),
-                )
-                # Force date and next_birthday columns to datetime.date type (required for SQLite)
-                df_birthdays["date"] = pd.to_datetime(
-                    df_birthdays["date"], errors="coerce"
-                ).dt.date
-                df_birthdays["next_birthday"] = pd.to_datetime(
-                    df_birthdays["next_birthday"], errors="coerce"
-                ).dt.date
+                # Get birthdays from snapshot
+                df_birthdays = snapshot.birthdays
                 # If birthdays are found populate column
                 if not df_birthdays.empty:
                     # Add birthdays title and records
@@ -584,6 +585,130 @@ class Waiter:
             log.debug("birthdays reloaded")
             # Clean stats column
             gi.sidebar_stats_col.clear()
+            # Stats top text
+            stats_and_info_text = gi.build_stats_and_info_text(
+                auth_user=self.auth_user,
+                session=session,
+                df_stats=snapshot.stats,
+                version=__version__,
+                host_name=self.hostname,
+                stylesheets=[self.config.panel.gui.css_files.stats_info_path],
+            )
+            # Stats table (copy the shared dataframe before passing it to
+            # the widget)
+            df_stats = snapshot.stats_pivot.copy()
+            # Add value and non-editable option to stats table
+            gi.stats_widget.editors = {c: None for c in df_stats.columns}
+            gi.stats_widget.value = df_stats
+            gi.sidebar_stats_col.append(stats_and_info_text["stats"])
+            gi.sidebar_stats_col.append(gi.stats_widget)
+            if gi.download_stats_parquet_button is not None:
+                gi.sidebar_stats_col.append(gi.download_stats_parquet_button)
+            # Add info below person widget (an empty placeholder was left as last
+            # element)
+            gi.sidebar_person_column.objects[-1] = stats_and_info_text["info"]
+            log.debug("stats and info updated")
+
+    def _keep_menu_selections(
+        self, df: pd.DataFrame, df_current: pd.DataFrame | None
+    ) -> pd.DataFrame:
+        """Copy selections and notes not sent yet from the menu shown to the
+        user to the reloaded menu.
+
+        Items are matched by menu ID and name, so selections of items that
+        are no longer in the menu are dropped.
+
+        Args:
+            df (pd.DataFrame): reloaded menu (with `order` and note columns).
+            df_current (pd.DataFrame | None): menu shown to the user.
+
+        Returns:
+            pd.DataFrame: reloaded menu with user selections.
+        """
+        note_column_name = self.config.panel.gui.note_column_name
+        if not isinstance(df_current, pd.DataFrame) or not {
+            "item",
+            "order",
+            note_column_name,
+        }.issubset(df_current.columns):
+            return df
+
+        df_current = df_current.reindex(df.index)
+        same_item = df_current["item"].eq(df["item"])
+        df.loc[same_item, "order"] = (
+            df_current.loc[same_item, "order"].fillna(False).astype(bool)
+        )
+        df.loc[same_item, note_column_name] = df_current.loc[
+            same_item, note_column_name
+        ].fillna("")
+
+        return df
+
+    def build_lunch_snapshot(
+        self, version: int, session: Session | None = None
+    ) -> state.LunchSnapshot:
+        """Query the database and build the lunch data shared by all sessions.
+
+        Menu, orders (see `df_list_by_lunch_time`), guests lists, birthdays, stats
+        and the "no more orders" flag are collected.
+        Today's stats are also updated in the `stats` table.
+
+        Args:
+            version (int): lunch state version used to tag the snapshot.
+            session (Session | None, optional): SQLAlchemy session to reuse.
+                If `None` a new session is created. Defaults to None.
+
+        Returns:
+            state.LunchSnapshot: new lunch snapshot.
+        """
+        with self.database_connector.session_scope(session) as session:
+            # Menu
+            df_menu = models.Menu.read_as_df(
+                config=self.config,
+                session=session,
+                index_col="id",
+            )
+
+            # Orders
+            df_dict = self.df_list_by_lunch_time(
+                session=session, df_menu=df_menu
+            )
+
+            # "No more orders" flag
+            no_more_orders = self.database_connector.get_flag(
+                id="no_more_orders", session=session
+            )
+
+            # Build guests list (one per each guest types)
+            guests_lists = {}
+            for guest_type in self.config.panel.guest_types:
+                guests_lists[guest_type] = [
+                    user.id
+                    for user in session.scalars(
+                        select(models.Users).where(
+                            models.Users.guest == guest_type
+                        )
+                    ).all()
+                ]
+
+            # Birthdays
+            if self.config.panel.birthdays_notification.enabled:
+                df_birthdays = self.database_connector.read_sql_query(
+                    session=session,
+                    query=self.config.db.birthdays_query.format(
+                        schema=self.config.db.get("schema", models.SCHEMA)
+                    ),
+                )
+                # Force date and next_birthday columns to datetime.date type (required for SQLite)
+                df_birthdays["date"] = pd.to_datetime(
+                    df_birthdays["date"], errors="coerce"
+                ).dt.date
+                df_birthdays["next_birthday"] = pd.to_datetime(
+                    df_birthdays["next_birthday"], errors="coerce"
+                ).dt.date
+            else:
+                df_birthdays = pd.DataFrame()
+
             # Update stats
             # Find how many people eat today (total number) and add value to database
             # stats table (when adding a stats if guest is not specified None is used
@@ -625,36 +750,33 @@ class Waiter:
                     schema=self.config.db.get("schema", models.SCHEMA)
                 ),
             )
-            # Stats top text
-            stats_and_info_text = gi.build_stats_and_info_text(
-                auth_user=self.auth_user,
-                df_stats=df_stats,
-                version=__version__,
-                host_name=self.hostname,
-                stylesheets=[self.config.panel.gui.css_files.stats_info_path],
-            )
-            # Remove NotAGuest (non-guest users)
-            df_stats.Guest = df_stats.Guest.replace(
-                "NotAGuest", self.config.panel.stats_locals_column_name
-            )
-            # Pivot table on guest type
-            df_stats = df_stats.pivot(
-                columns="Guest",
-                index=self.config.panel.stats_id_cols,
-                values="Hungry People",
-            ).reset_index()
-            df_stats[self.config.panel.gui.total_column_name.title()] = (
-                df_stats.sum(axis="columns", numeric_only=True)
-            )
-            # Add value and non-editable option to stats table
-            gi.stats_widget.editors = {c: None for c in df_stats.columns}
-            gi.stats_widget.value = df_stats
-            gi.sidebar_stats_col.append(stats_and_info_text["stats"])
-            gi.sidebar_stats_col.append(gi.stats_widget)
-            # Add info below person widget (an empty placeholder was left as last
-            # element)
-            gi.sidebar_person_column.objects[-1] = stats_and_info_text["info"]
-            log.debug("stats and info updated")
+
+        # Remove NotAGuest (non-guest users)
+        df_stats_pivot = df_stats.copy()
+        df_stats_pivot.Guest = df_stats_pivot.Guest.replace(
+            "NotAGuest", self.config.panel.stats_locals_column_name
+        )
+        # Pivot table on guest type
+        df_stats_pivot = df_stats_pivot.pivot(
+            columns="Guest",
+            index=self.config.panel.stats_id_cols,
+            values="Hungry People",
+        ).reset_index()
+        df_stats_pivot[self.config.panel.gui.total_column_name.title()] = (
+            df_stats_pivot.sum(axis="columns", numeric_only=True)
+        )
+
+        return state.LunchSnapshot(
+            version=version,
+            date=dt.date.today(),
+            menu=df_menu,
+            orders=df_dict,
+            guests_lists=guests_lists,
+            stats=df_stats,
+            stats_pivot=df_stats_pivot,
+            birthdays=df_birthdays,
+            no_more_orders=no_more_orders,
+        )
 
     def send_order(
         self,
@@ -691,7 +813,9 @@ class Waiter:
 
         with session:
             # Check if the "no more order" toggle button is pressed
-            if self.database_connector.get_flag(id="no_more_orders"):
+            if self.database_connector.get_flag(
+                id="no_more_orders", session=session
+            ):
                 pn.state.notifications.error(
                     "It is not possible to place new orders",
                     duration=self.config.panel.notifications.duration,
@@ -708,10 +832,12 @@ class Waiter:
             # If auth is active, check if a guests is using a name reserved to a
             # privileged user
             if (
-                self.auth_user.is_guest()
+                self.auth_user.is_guest(session=session)
                 and (
                     username_key_press
-                    in self.auth_user.auth_context.list_privileged_users()
+                    in self.auth_user.auth_context.list_privileged_users(
+                        session=session
+                    )
                 )
                 and (self.auth_user.auth_context.is_auth_active())
             ):
@@ -730,12 +856,14 @@ class Waiter:
 
             # Check if a privileged user is ordering for an invalid name
             if (
-                not self.auth_user.is_guest()
+                not self.auth_user.is_guest(session=session)
                 and (
                     username_key_press
                     not in (
                         name
-                        for name in self.auth_user.auth_context.list_privileged_users()
+                        for name in self.auth_user.auth_context.list_privileged_users(
+                            session=session
+                        )
                         if name != "guest"
                     )
                 )
@@ -773,7 +901,7 @@ class Waiter:
                     try:
                         # Add User
                         # Do not pass guest for privileged users (default to NotAGuest)
-                        if self.auth_user.is_guest():
+                        if self.auth_user.is_guest(session=session):
                             new_user = models.Users(
                                 id=username_key_press,
                                 guest=person.guest,
@@ -801,6 +929,9 @@ class Waiter:
                             session.add(new_order)
                             session.commit()
 
+                        # Invalidate lunch data shared by all sessions and notify them
+                        state.notify_change(topic="orders")
+
                         # Update dataframe widget
                         self.reload_menu(
                             None,
@@ -813,6 +944,8 @@ class Waiter:
                         )
                         log.info(f"{username_key_press}'s order saved")
                     except Exception as e:
+                        # Tables may have been partially updated
+                        state.notify_change(topic="orders")
                         # Any exception here is a database fault
                         pn.state.notifications.error(
                             "Database error",
@@ -869,7 +1002,9 @@ class Waiter:
 
         with session:
             # Check if the "no more order" toggle button is pressed
-            if self.database_connector.get_flag(id="no_more_orders"):
+            if self.database_connector.get_flag(
+                id="no_more_orders", session=session
+            ):
                 pn.state.notifications.error(
                     "It is not possible to delete orders",
                     duration=self.config.panel.notifications.duration,
@@ -887,10 +1022,12 @@ class Waiter:
                 # If auth is active, check if a guests is deleting an order of a
                 # privileged user
                 if (
-                    self.auth_user.is_guest()
+                    self.auth_user.is_guest(session=session)
                     and (
                         username_key_press
-                        in self.auth_user.auth_context.list_privileged_users()
+                        in self.auth_user.auth_context.list_privileged_users(
+                            session=session
+                        )
                     )
                     and (self.auth_user.auth_context.is_auth_active())
                 ):
@@ -924,6 +1061,9 @@ class Waiter:
                     if (num_rows_deleted_users.rowcount > 0) or (
                         num_rows_deleted_orders.rowcount > 0
                     ):
+                        # Invalidate lunch data shared by all sessions and notify them
+                        state.notify_change(topic="orders")
+
                         # Update dataframe widget
                         self.reload_menu(
                             None,
@@ -984,7 +1124,9 @@ class Waiter:
 
         with session:
             # Check if the "no more order" toggle button is pressed
-            if self.database_connector.get_flag(id="no_more_orders"):
+            if self.database_connector.get_flag(
+                id="no_more_orders", session=session
+            ):
                 pn.state.notifications.error(
                     "It is not possible to update orders (time)",
                     duration=self.config.panel.notifications.duration,
@@ -1024,6 +1166,9 @@ class Waiter:
                     updated_items_names = [
                         order.menu_item.item for order in updated_user.orders
                     ]
+                    # Invalidate lunch data shared by all sessions and notify them
+                    state.notify_change(topic="orders")
+
                     # Update dataframe widget
                     self.reload_menu(
                         None,
@@ -1050,6 +1195,8 @@ class Waiter:
 
     def df_list_by_lunch_time(
         self,
+        session: Session | None = None,
+        df_menu: pd.DataFrame | None = None,
     ) -> dict:
         """Build a dictionary of dataframes for each lunch-time, with takeaways included in a dedicated dataframe.
 
@@ -1058,122 +1205,250 @@ class Waiter:
 
         The keys of the dataframe are `lunch-times` and `lunch-times + takeaway_id`.
 
+        Args:
+            session (Session | None, optional): SQLAlchemy session to reuse.
+                If `None` a new session is created. Defaults to None.
+            df_menu (pd.DataFrame | None, optional): menu already read (with
+                `id` as index). If `None` the menu is read from the database.
+                Defaults to None.
+
         Returns:
             dict: dictionary with dataframes summarizing the orders for each lunch-time/takeaway-time.
         """
-        # Read menu and save how menu items are sorted (first courses, second courses, etc.)
-        original_order = models.Menu.read_as_df(
-            config=self.config,
-            index_col="id",
-        ).item
-        # Create session
-        session = self.database_connector.create_session()
+        with self.database_connector.session_scope(session) as session:
+            # Read menu and save how menu items are sorted (first courses, second courses, etc.)
+            if df_menu is None:
+                df_menu = models.Menu.read_as_df(
+                    config=self.config,
+                    session=session,
+                    index_col="id",
+                )
+            original_order = df_menu.item
+            # Read orders already aggregated by the database
+            schema = self.config.db.get("schema", models.SCHEMA)
+            df_selections = self.database_connector.read_sql_query(
+                session=session,
+                query=self.config.db.orders_selections_query.format(
+                    schema=schema
+                ),
+            )
+            df_summary = self.read_orders_summary(
+                session=session, schema=schema
+            )
 
-        with session:
-            # Build takeaway list
-            takeaway_list = [
-                user.id
-                for user in session.scalars(
-                    select(models.Users).where(
-                        models.Users.takeaway == sql_true()
-                    )
-                ).all()
-            ]
-        # Read orders dataframe (including notes)
-        df = self.database_connector.read_sql_query(
+        return self.build_lunch_time_tables(
+            df_selections=df_selections,
+            df_summary=df_summary,
+            original_order=original_order,
+        )
+
+    def read_orders_summary(
+        self, session: Session, schema: str | None
+    ) -> pd.DataFrame:
+        """Read totals and notes of each menu item for each lunch-time/takeaway-time.
+
+        Notes are sorted by count (descending) and text. SQLite sorts
+        concatenated values only from version 3.44: with older versions notes
+        are read one per row (see `config.db.orders_notes_query`) and
+        aggregated with pandas (see `build_orders_summary`).
+
+        Args:
+            session (Session): SQLAlchemy session object.
+            schema (str | None): database schema (used to format queries).
+
+        Returns:
+            pd.DataFrame: totals and notes (columns are `lunch_time`,
+                `takeaway`, `item`, `total` and `note`).
+        """
+        dialect = session.bind.dialect
+        if dialect.name == "sqlite" and (
+            dialect.server_version_info or (0,)
+        ) < (3, 44, 0):
+            df_notes = self.database_connector.read_sql_query(
+                session=session,
+                query=self.config.db.orders_notes_query.format(schema=schema),
+            )
+            return self.build_orders_summary(df_notes)
+
+        return self.database_connector.read_sql_query(
             session=session,
-            query=self.config.db.orders_query.format(
-                schema=self.config.db.get("schema", models.SCHEMA)
-            ),
+            query=self.config.db.orders_summary_query.format(schema=schema),
         )
 
-        # The following function prepare the dataframe before saving it into
-        # the dictionary that will be returned
-        def _clean_up_table(
-            config: DictConfig,
-            df_in: pd.DataFrame,
-            df_complete: pd.DataFrame,
-        ):
-            df = df_in.copy()
-            # Group notes per menu item by concat users notes
-            # Use value counts to keep track of how many time a note is repeated
-            df_notes = (
-                df_complete[
-                    (df_complete.lunch_time == time)
-                    & (df_complete.note != "")
-                    & (df_complete.user.isin(df.columns))
-                ]
-                .drop(columns=["user", "lunch_time"])
-                .value_counts()
-                .reset_index(level="note")
+    def build_orders_summary(self, df_notes: pd.DataFrame) -> pd.DataFrame:
+        """Aggregate notes counted for each menu item in totals and notes
+        (same result of `config.db.orders_summary_query`).
+
+        Args:
+            df_notes (pd.DataFrame): notes counted for each menu item (columns
+                are `lunch_time`, `takeaway`, `item`, `note` and
+                `note_count`), see `config.db.orders_notes_query`.
+
+        Returns:
+            pd.DataFrame: totals and notes (columns are `lunch_time`,
+                `takeaway`, `item`, `total` and `note`).
+        """
+        note_sep = self.config.panel.gui.note_sep
+        group_cols = ["lunch_time", "takeaway", "item"]
+
+        if df_notes.empty:
+            return pd.DataFrame(columns=group_cols + ["total", "note"])
+
+        # Sort before grouping (groups keep the order of their rows)
+        df_notes = df_notes.sort_values(
+            ["note_count", "note"], ascending=[False, True]
+        )
+        totals = (
+            df_notes.groupby(group_cols, dropna=False)["note_count"]
+            .sum()
+            .rename("total")
+        )
+        df_with_notes = df_notes[df_notes["note"] != ""]
+        notes = (
+            df_with_notes["note_count"]
+            .astype(str)
+            .str.cat(df_with_notes["note"], sep=note_sep.count)
+            .groupby(
+                [df_with_notes[c] for c in group_cols],
+                dropna=False,
+                sort=False,
             )
-            df_notes.note = (
-                df_notes["count"]
-                .astype(str)
-                .str.cat(df_notes.note, sep=config.panel.gui.note_sep.count)
+            .agg(note_sep.element.join)
+            .rename("note")
+        )
+
+        return totals.to_frame().join(notes).reset_index()
+
+    def build_lunch_time_tables(
+        self,
+        df_selections: pd.DataFrame,
+        df_summary: pd.DataFrame,
+        original_order: pd.Series,
+    ) -> dict:
+        """Build the dataframes returned by `df_list_by_lunch_time` starting from orders aggregated by the database.
+
+        Users' selections of every lunch-time/takeaway-time are unstacked in
+        a single pass (with categorical items and users), then the result is
+        split in one dataframe for each lunch-time/takeaway-time and joined
+        with totals and notes.
+
+        Args:
+            df_selections (pd.DataFrame): how many times each user selected a
+                menu item (columns are `lunch_time`, `takeaway`, `item`,
+                `user` and `count`), see `config.db.orders_selections_query`.
+            df_summary (pd.DataFrame): totals and notes for each menu item
+                (columns are `lunch_time`, `takeaway`, `item`, `total` and
+                `note`), see `config.db.orders_summary_query`.
+            original_order (pd.Series): menu items (used to sort rows).
+
+        Returns:
+            dict: dictionary with dataframes summarizing the orders for each lunch-time/takeaway-time.
+        """
+        gui_config = self.config.panel.gui
+        slot_cols = ["lunch_time", "takeaway"]
+
+        if df_selections.empty:
+            return {}
+
+        # Categoricals speed up unstacking (categories are sorted, so users
+        # are sorted as in a pivot table)
+        # Takeaway is cast to bool since SQLite returns integers
+        df_users = (
+            df_selections.astype(
+                {"item": "category", "user": "category", "takeaway": bool}
             )
-            df_notes = df_notes.drop(columns="count")
-            df_notes = (
-                df_notes.groupby("item")["note"]
-                .apply(config.panel.gui.note_sep.element.join)
-                .to_frame()
+            .set_index(slot_cols + ["item", "user"])["count"]
+            .unstack("user")
+            .astype(float)
+        )
+        df_users.columns = df_users.columns.astype(object).rename(None)
+
+        # Totals and notes of each lunch time
+        summaries = {
+            slot: slot_summary.droplevel(slot_cols)
+            for slot, slot_summary in df_summary.astype({"takeaway": bool})
+            .set_index(slot_cols + ["item"])
+            .groupby(level=slot_cols)
+        }
+
+        # Build a dict of dataframes, one for each lunch time (restaurant
+        # lunches and takeaway lunches are split)
+        df_dict = {}
+        for (time, takeaway), df_slot in df_users.groupby(
+            level=slot_cols, sort=True
+        ):
+            # Keep only users of this lunch time
+            df_slot = df_slot.droplevel(slot_cols).dropna(axis=1, how="all")
+            df_slot.index = df_slot.index.astype(object)
+            # Reorder index in accordance with original menu
+            df_slot = df_slot.reindex(original_order)
+            if df_slot.empty:
+                continue
+            # Add columns of totals and notes (unused items have total 0)
+            slot_summary = summaries[(time, takeaway)].reindex(df_slot.index)
+            df_slot[gui_config.total_column_name] = (
+                slot_summary["total"].fillna(0).astype(float)
             )
-            # Add columns of totals
-            df[config.panel.gui.total_column_name] = df.sum(axis=1)
+            df_slot[gui_config.note_column_name] = slot_summary["note"]
             # Drop unused rows if requested
-            if config.panel.drop_unused_menu_items:
-                df = df[df[config.panel.gui.total_column_name] > 0]
-            # Add notes
-            df = df.join(df_notes)
-            df = df.rename(columns={"note": config.panel.gui.note_column_name})
-            # Change NaNs to '-'
-            df = df.fillna("-")
-            # Avoid mixed types (float and notes str)
-            df = df.astype(object)
+            if self.config.panel.drop_unused_menu_items:
+                df_slot = df_slot[df_slot[gui_config.total_column_name] > 0]
+            # Change NaNs to '-' and avoid mixed types (float and notes str)
+            df_slot = df_slot.astype(object).where(df_slot.notna(), "-")
 
-            return df
+            if takeaway:
+                df_dict[f"{time} {gui_config.takeaway_id}"] = df_slot
+            else:
+                df_dict[time] = df_slot
 
-        # Build a dict of dataframes, one for each lunch time
-        df_dict = {}
-        for time in df.lunch_time.sort_values().unique():
-            # Take only one lunch time (and remove notes so they do not alter
-            # numeric counters inside the pivot table)
-            temp_df = (
-                df[df.lunch_time == time]
-                .drop(columns=["lunch_time", "note"])
-                .reset_index(drop=True)
-            )
-            # Users' selections
-            df_users = temp_df.pivot_table(
-                index="item", columns="user", aggfunc=len
+        return df_dict
+
+    def download_orders_parquet(self) -> BytesIO:
+        """Build a Parquet file with users' selections.
+
+        The file has one row for each user and menu item, with columns
+        `lunch_time`, `takeaway`, `item`, `user` and `count`.
+
+        The result is returned as bytes stream to satisfy panel.widgets.FileDownload class requirements.
+
+        Returns:
+            BytesIO: download stream for the Parquet file.
+        """
+        with self.database_connector.session_scope() as session:
+            df = self.database_connector.read_sql_query(
+                session=session,
+                query=self.config.db.orders_selections_query.format(
+                    schema=self.config.db.get("schema", models.SCHEMA)
+                ),
             )
-            # Reorder index in accordance with original menu
-            df_users = df_users.reindex(original_order)
-            # Split restaurant lunches from takeaway lunches
-            df_users_restaurant = df_users.loc[
-                :, [c for c in df_users.columns if c not in takeaway_list]
-            ]
-            df_users_takeaways = df_users.loc[
-                :, [c for c in df_users.columns if c in takeaway_list]
-            ]
-
-            # Clean and add resulting dataframes to dict
-            # RESTAURANT LUNCH
-            if not df_users_restaurant.empty:
-                df_users_restaurant = _clean_up_table(
-                    self.config, df_users_restaurant, df
-                )
-                df_dict[time] = df_users_restaurant
-            # TAKEAWAY
-            if not df_users_takeaways.empty:
-                df_users_takeaways = _clean_up_table(
-                    self.config, df_users_takeaways, df
-                )
-                df_dict[f"{time} {self.config.panel.gui.takeaway_id}"] = (
-                    df_users_takeaways
-                )
+        # SQLite returns integers for booleans
+        df = df.astype({"takeaway": bool})
 
-        return df_dict
+        bytes_io = BytesIO()
+        formats.write_chunks([df], bytes_io, file_format="parquet")
+        bytes_io.seek(0)
+        log.info(f"orders exported to parquet ({len(df)} rows)")
+
+        return bytes_io
+
+    def download_stats_parquet(self) -> BytesIO:
+        """Build a Parquet file with the stats table (dates are stored as dates).
+
+        The result is returned as bytes stream to satisfy panel.widgets.FileDownload class requirements.
+
+        Returns:
+            BytesIO: download stream for the Parquet file.
+        """
+        df = formats.convert_date_columns(
+            models.Stats.read_as_df(config=self.config), ["date"]
+        )
+
+        bytes_io = BytesIO()
+        formats.write_chunks([df], bytes_io, file_format="parquet")
+        bytes_io.seek(0)
+        log.info(f"stats exported to parquet ({len(df)} rows)")
+
+        return bytes_io
 
     def download_dataframe(
         self,
@@ -1184,6 +1459,13 @@ class Waiter:
         Tables are created by the function `df_list_by_lunch_time` and exported on dedicated Excel worksheets
         (inside the same workbook).
 
+        The Excel engine is selected by `config.panel.excel_export.engine`:
+        `xlsxwriter` (faster, rows are written in constant memory mode) or `openpyxl`.
+
+        The workbook is built from the lunch snapshot and cached with it, so
+        it is shared by all sessions and rebuilt only after orders, menu or
+        users change (i.e. when the lunch state version is bumped).
+
         The result is returned as bytes stream to satisfy panel.widgets.FileDownload class requirements.
 
         Args:
@@ -1193,40 +1475,196 @@ class Waiter:
             BytesIO: download stream for the Excel file.
         """
 
-        # Build a dict of dataframes, one for each lunch time (the key contains
-        # a lunch time)
-        df_dict = self.df_list_by_lunch_time()
-        # Export one dataframe for each lunch time
-        bytes_io = BytesIO()
-        writer = pd.ExcelWriter(bytes_io)
+        # Get the dict of dataframes, one for each lunch time (the key contains
+        # a lunch time), from the lunch data shared by all sessions
+        snapshot = state.lunch_state.get_snapshot(
+            builder=lambda version: self.build_lunch_snapshot(version=version)
+        )
+        engine = self.config.panel.excel_export.engine
         # If the dataframe dict is non-empty export one dataframe for each sheet
-        if df_dict:
+        if snapshot.orders:
+            # Each session gets its own stream over the cached workbook
+            bytes_io = BytesIO(
+                snapshot.get_artifact(
+                    name=f"orders_xlsx_{engine}",
+                    builder=lambda snapshot: self._build_orders_xlsx(
+                        snapshot.orders
+                    ),
+                )
+            )
+
+            # Message prompt
+            pn.state.notifications.success(
+                "File with orders downloaded",
+                duration=self.config.panel.notifications.duration,
+            )
+            log.info(f"xlsx downloaded ({engine})")
+        else:
+            bytes_io = BytesIO()
+            with pd.ExcelWriter(bytes_io, engine=engine) as writer:
+                gi.dataframe.value.drop(columns=["order"]).to_excel(
+                    writer, sheet_name="MENU", index=False
+                )
+            bytes_io.seek(0)  # Important!
+            # Message prompt
+            pn.state.notifications.warning(
+                "No order<br>Menu downloaded",
+                duration=self.config.panel.notifications.duration,
+            )
+            log.warning(
+                "no order, menu exported to excel in place of orders' list"
+            )
+
+        return bytes_io
+
+    def _build_orders_xlsx(self, df_dict: dict) -> bytes:
+        """Build the Excel workbook with orders (one worksheet for each lunch time).
+
+        Args:
+            df_dict (dict): dictionary with dataframes summarizing the orders
+                (see `df_list_by_lunch_time`).
+
+        Returns:
+            bytes: content of the Excel file.
+        """
+        engine = self.config.panel.excel_export.engine
+        bytes_io = BytesIO()
+        if engine == "xlsxwriter":
+            self._write_orders_with_xlsxwriter(df_dict, bytes_io)
+        else:
+            self._write_orders_with_openpyxl(df_dict, bytes_io)
+        log.debug(f"xlsx with orders built ({engine})")
+
+        return bytes_io.getvalue()
+
+    def _get_worksheet_layout(
+        self, time: str, df: pd.DataFrame
+    ) -> tuple[str, str, int, list[float]]:
+        """Compute name, title, number of users and columns widths of the worksheet of a lunch time.
+
+        Widths are computed from the dataframe, with vectorized string lengths.
+        All users' columns have the same width (the largest one).
+
+        Args:
+            time (str): lunch time (a key of the dict returned by `df_list_by_lunch_time`).
+            df (pd.DataFrame): orders of the lunch time.
+
+        Returns:
+            tuple[str, str, int, list[float]]: worksheet name, title, number of
+                users and width of each column (index included).
+        """
+        # Users are all columns except total and note
+        users_n = len(df.columns) - 2
+        worksheet_name = time.replace(":", ".")
+        title = f"Time - {time} | # {users_n}"
+
+        # Max string length of each column (header included), the index
+        # column includes also the title
+        df_values = df.reset_index()
+        df_headers = pd.DataFrame(
+            [[str(c) for c in df_values.columns]], columns=df_values.columns
+        )
+        max_lengths = (
+            pd.concat([df_headers, df_values])
+            .astype(str)
+            .apply(lambda c: c.str.len())
+            .max()
+            .tolist()
+        )
+        max_lengths[0] = max(max_lengths[0], len(title))
+        widths = [(length + 2) * 0.85 for length in max_lengths]
+        # Use the same width for all users' columns
+        users_width = max(widths[1 : users_n + 1], default=0)
+        widths[1 : users_n + 1] = [users_width] * users_n
+
+        return worksheet_name, title, users_n, widths
+
+    def _write_orders_with_xlsxwriter(
+        self, df_dict: dict, bytes_io: BytesIO
+    ) -> None:
+        """Write orders to an Excel workbook with `xlsxwriter`.
+
+        Rows are written in order (constant memory mode) and formats are set
+        on columns, not on cells.
+
+        Args:
+            df_dict (dict): dataframes returned by `df_list_by_lunch_time`.
+            bytes_io (BytesIO): output stream.
+        """
+        workbook = xlsxwriter.Workbook(
+            bytes_io, {"constant_memory": True, "nan_inf_to_errors": True}
+        )
+        title_format = workbook.add_format(
+            {"bold": True, "font_size": 13, "font_color": "#FF0000"}
+        )
+        header_format = workbook.add_format(
+            {"bold": True, "border": 1, "align": "center"}
+        )
+        index_format = workbook.add_format(
+            {"bold": True, "border": 1, "align": "left"}
+        )
+        center_format = workbook.add_format({"align": "center"})
+        left_format = workbook.add_format({"align": "left"})
+
+        for time, df in df_dict.items():
+            log.info(f"writing sheet {time}")
+            worksheet_name, title, users_n, widths = (
+                self._get_worksheet_layout(time, df)
+            )
+            worksheet = workbook.add_worksheet(worksheet_name)
+
+            # COLUMNS FORMAT AND SIZE
+            # Index (A), users (grouped and hidden), total and note
+            worksheet.set_column(0, 0, widths[0], left_format)
+            if users_n > 0:
+                worksheet.set_column(
+                    1,
+                    users_n,
+                    widths[1],
+                    center_format,
+                    {"level": 1, "hidden": True},
+                )
+            worksheet.set_column(
+                users_n + 1, users_n + 1, widths[-2], center_format
+            )
+            worksheet.set_column(
+                users_n + 2, users_n + 2, widths[-1], left_format
+            )
+
+            # ROWS (title, header and data, in this order)
+            worksheet.write_string(0, 0, title, title_format)
+            worksheet.write(1, 0, df.index.name, index_format)
+            worksheet.write_row(1, 1, df.columns.tolist(), header_format)
+            for row, (item, values) in enumerate(
+                zip(df.index, df.itertuples(index=False, name=None)),
+                start=2,
+            ):
+                worksheet.write(row, 0, item, index_format)
+                worksheet.write_row(row, 1, values)
+
+        workbook.close()
+
+    def _write_orders_with_openpyxl(
+        self, df_dict: dict, bytes_io: BytesIO
+    ) -> None:
+        """Write orders to an Excel workbook with `openpyxl`.
+
+        Args:
+            df_dict (dict): dataframes returned by `df_list_by_lunch_time`.
+            bytes_io (BytesIO): output stream.
+        """
+        with pd.ExcelWriter(bytes_io, engine="openpyxl") as writer:
             for time, df in df_dict.items():
                 log.info(f"writing sheet {time}")
-
-                # Find users that placed an order for a given time
-                users_n = len(
-                    [
-                        c
-                        for c in df.columns
-                        if c
-                        not in (
-                            self.config.panel.gui.total_column_name,
-                            self.config.panel.gui.note_column_name,
-                        )
-                    ]
+                worksheet_name, title, users_n, widths = (
+                    self._get_worksheet_layout(time, df)
                 )
 
                 # Export dataframe to new sheet
-                worksheet_name = time.replace(":", ".")
                 df.to_excel(writer, sheet_name=worksheet_name, startrow=1)
                 # Add title
                 worksheet = writer.sheets[worksheet_name]
-                worksheet.cell(
-                    1,
-                    1,
-                    f"Time - {time} | # {users_n}",
-                )
+                worksheet.cell(1, 1, title)
 
                 # HEADER FORMAT
                 worksheet["A1"].font = Font(
@@ -1234,94 +1672,24 @@ class Waiter:
                 )
 
                 # INDEX ALIGNMENT
+                # Column styles do not apply to cells already written
                 for row in worksheet[worksheet.min_row : worksheet.max_row]:
-                    cell = row[0]  # column A
-                    cell.alignment = Alignment(horizontal="left")
-                    cell = row[users_n + 2]  # column note
-                    cell.alignment = Alignment(horizontal="left")
-                    cells = row[1 : users_n + 2]  # from column B to note-1
-                    for cell in cells:
+                    row[0].alignment = Alignment(horizontal="left")
+                    row[users_n + 2].alignment = Alignment(horizontal="left")
+                    for cell in row[1 : users_n + 2]:
                         cell.alignment = Alignment(horizontal="center")
 
                 # AUTO SIZE
-                # Set auto-size for all columns
                 # Use end +1 for ID column, and +2 for 'total' and 'note' columns
                 column_letters = get_column_interval(
                     start=1, end=users_n + 1 + 2
                 )
-                # Get columns
-                columns = worksheet[column_letters[0] : column_letters[-1]]
-                for column_letter, column in zip(column_letters, columns):
-                    # Instantiate max length then loop on cells to find max value
-                    max_length = 0
-                    # Cell loop
-                    for cell in column:
-                        log.debug(
-                            f"autosize for cell {cell.coordinate} with value '{cell.value}'"
-                        )
-                        try:  # Necessary to avoid error on empty cells
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(cell.value)
-                                log.debug(
-                                    f"new max length set to {max_length}"
-                                )
-                        except Exception:
-                            log.debug("empty cell")
-                    log.debug(f"final max length is {max_length}")
-                    adjusted_width = (max_length + 2) * 0.85
-                    log.debug(
-                        f"adjusted width for column '{column_letter}' is {adjusted_width}"
-                    )
-                    worksheet.column_dimensions[column_letter].width = (
-                        adjusted_width
-                    )
-                # Since grouping fix width equal to first column width (openpyxl
-                # bug), set first column of users' order equal to max width of
-                # all users columns to avoid issues
-                max_width = 0
-                log.debug(
-                    f"find max width for users' columns '{column_letters[1]}:{column_letters[-3]}'"
-                )
-                for column_letter in column_letters[1:-2]:
-                    max_width = max(
-                        max_width,
-                        worksheet.column_dimensions[column_letter].width,
-                    )
-                log.debug(f"max width for first users' columns is {max_width}")
-                worksheet.column_dimensions[column_letters[1]].width = (
-                    max_width
-                )
+                for column_letter, width in zip(column_letters, widths):
+                    worksheet.column_dimensions[column_letter].width = width
 
                 # GROUPING
                 # Group and hide columns, leave only ID, total and note
-                column_letters = get_column_interval(start=2, end=users_n + 1)
+                # (grouping fix width equal to first column width)
                 worksheet.column_dimensions.group(
-                    column_letters[0], column_letters[-1], hidden=True
+                    column_letters[1], column_letters[users_n], hidden=True
                 )
-
-                # Close and reset bytes_io for the next dataframe
-                writer.close()  # Important!
-                bytes_io.seek(0)  # Important!
-
-            # Message prompt
-            pn.state.notifications.success(
-                "File with orders downloaded",
-                duration=self.config.panel.notifications.duration,
-            )
-            log.info("xlsx downloaded")
-        else:
-            gi.dataframe.value.drop(columns=["order"]).to_excel(
-                writer, sheet_name="MENU", index=False
-            )
-            writer.close()  # Important!
-            bytes_io.seek(0)  # Important!
-            # Message prompt
-            pn.state.notifications.warning(
-                "No order<br>Menu downloaded",
-                duration=self.config.panel.notifications.duration,
-            )
-            log.warning(
-                "no order, menu exported to excel in place of orders' list"
-            )
-
-        return bytes_io
@@ -0,0 +1,287 @@
+"""Module with functions used to read and write tables as CSV, Parquet or
+Arrow IPC files.
+
+The file format is selected from the file extension (see `FILE_FORMATS`).
+Parquet and Arrow IPC keep columns types (e.g. dates and booleans) and
+require the optional dependency `pyarrow` (install `dlunch[parquet]`).
+
+Tables are read and written in chunks, so that large tables can be streamed
+without keeping them in memory.
+"""
+
+import datetime as dt
+import logging
+import pandas as pd
+import pathlib
+
+from collections.abc import Iterable, Iterator
+from io import BytesIO
+from typing import Any
+
+# LOGGER ----------------------------------------------------------------------
+log: logging.Logger = logging.getLogger(__name__)
+"""Module logger."""
+
+# FILE FORMATS ----------------------------------------------------------------
+FILE_FORMATS: dict[str, str] = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+"""File formats selected by file extension."""
+
+
+# FUNCTIONS -------------------------------------------------------------------
+def is_pyarrow_available() -> bool:
+    """Check if the optional dependency `pyarrow` is installed.
+
+    Returns:
+        bool: `True` if `pyarrow` can be imported.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def _import_pyarrow() -> Any:
+    """Import `pyarrow` with a meaningful error if it is missing.
+
+    Raises:
+        ImportError: missing library (pyarrow).
+
+    Returns:
+        Any: `pyarrow` module.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for Parquet and Arrow files, install it with 'pip install dlunch[parquet]'"
+        ) from e
+
+    return pyarrow
+
+
+def get_file_format(file_path: str | pathlib.Path) -> str:
+    """Return the file format associated to the file extension.
+
+    Args:
+        file_path (str | pathlib.Path): file path.
+
+    Raises:
+        ValueError: unknown file extension.
+
+    Returns:
+        str: file format (`csv`, `parquet` or `arrow`).
+    """
+    suffix = pathlib.Path(file_path).suffix.lower()
+    try:
+        return FILE_FORMATS[suffix]
+    except KeyError:
+        raise ValueError(
+            f"unknown file extension '{suffix}' (valid extensions are {', '.join(FILE_FORMATS)})"
+        )
+
+
+def convert_date_columns(
+    df: pd.DataFrame, date_columns: Iterable[str]
+) -> pd.DataFrame:
+    """Convert datetime columns to dates.
+
+    Date columns are read from the database as datetimes, convert them so
+    that Parquet and Arrow files store them as dates.
+
+    Args:
+        df (pd.DataFrame): input dataframe.
+        date_columns (Iterable[str]): columns to convert (missing columns are skipped).
+
+    Returns:
+        pd.DataFrame: dataframe with converted columns.
+    """
+    columns = [
+        c
+        for c in date_columns
+        if c in df.columns and pd.api.types.is_datetime64_any_dtype(df[c])
+    ]
+    if not columns:
+        return df
+
+    return df.assign(**{c: df[c].dt.date for c in columns})
+
+
+def _get_arrow_type(python_type: type) -> Any:
+    """Return the Arrow type used to store values of a Python type.
+
+    Args:
+        python_type (type): Python type of column values.
+
+    Returns:
+        Any: Arrow data type (`None` if the type has no known Arrow type).
+    """
+    pa = _import_pyarrow()
+    # datetime is a subclass of date, so it is checked first
+    if issubclass(python_type, dt.datetime):
+        return pa.timestamp("ns")
+    arrow_types = {
+        bool: pa.bool_(),
+        int: pa.int64(),
+        float: pa.float64(),
+        str: pa.string(),
+        dt.date: pa.date32(),
+    }
+    for key, arrow_type in arrow_types.items():
+        if issubclass(python_type, key):
+            return arrow_type
+
+    return None
+
+
+def write_chunks(
+    chunks: Iterable[pd.DataFrame],
+    file_path: str | pathlib.Path | BytesIO,
+    file_format: str,
+    index: bool = False,
+    column_types: dict[str, type] | None = None,
+) -> int:
+    """Write dataframes to a single file, one chunk at a time.
+
+    For Parquet and Arrow files the schema is taken from the first chunk.
+    Columns listed in `column_types` are stored with the given types (the
+    first chunk may not tell them, e.g. empty or all-null columns).
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): dataframes with the same columns.
+        file_path (str | pathlib.Path | BytesIO): output file (or buffer).
+        file_format (str): file format (`csv`, `parquet` or `arrow`).
+        index (bool, optional): write index as a column. Defaults to False.
+        column_types (dict[str, type] | None, optional): Python types of
+            column values (used only by Parquet and Arrow files).
+            Defaults to None.
+
+    Raises:
+        ValueError: unknown file format.
+
+    Returns:
+        int: number of rows written.
+    """
+    num_rows_written = 0
+
+    if file_format == "csv":
+        for n, df in enumerate(chunks):
+            # First chunk with header, then append the others
+            df.to_csv(
+                file_path,
+                index=index,
+                mode="w" if n == 0 else "a",
+                header=n == 0,
+            )
+            num_rows_written += len(df)
+
+    elif file_format in ("parquet", "arrow"):
+        pa = _import_pyarrow()
+        chunks = iter(chunks)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            return 0
+        first_table = pa.Table.from_pandas(first_chunk, preserve_index=index)
+        schema = first_table.schema
+        if column_types:
+            fields = []
+            for field in schema:
+                arrow_type = None
+                if field.name in column_types:
+                    arrow_type = _get_arrow_type(column_types[field.name])
+                fields.append(field.with_type(arrow_type or field.type))
+            schema = pa.schema(fields, metadata=schema.metadata)
+            first_table = first_table.cast(schema)
+        if file_format == "parquet":
+            writer = pa.parquet.ParquetWriter(file_path, schema)
+        else:
+            writer = pa.ipc.new_file(file_path, schema)
+        with writer:
+            writer.write_table(first_table)
+            num_rows_written += len(first_chunk)
+            for df in chunks:
+                writer.write_table(
+                    pa.Table.from_pandas(
+                        df, schema=schema, preserve_index=index
+                    )
+                )
+                num_rows_written += len(df)
+
+    else:
+        raise ValueError(f"unknown file format '{file_format}'")
+
+    log.debug(f"{num_rows_written} rows written ({file_format})")
+
+    return num_rows_written
+
+
+def read_chunks(
+    file_path: str | pathlib.Path,
+    file_format: str,
+    chunksize: int | None = None,
+    index_col: str | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Read a file as an iterator of dataframes.
+
+    Args:
+        file_path (str | pathlib.Path): input file.
+        file_format (str): file format (`csv`, `parquet` or `arrow`).
+        chunksize (int | None, optional): number of rows of each dataframe.
+            If `None` the whole file is returned as a single dataframe.
+            Defaults to None.
+        index_col (str | None, optional): column used as index. Defaults to None.
+
+    Raises:
+        ValueError: unknown file format.
+
+    Yields:
+        Iterator[pd.DataFrame]: dataframes with file content.
+    """
+    if file_format == "csv":
+        if chunksize is None:
+            yield pd.read_csv(file_path, index_col=index_col)
+        else:
+            yield from pd.read_csv(
+                file_path, index_col=index_col, chunksize=chunksize
+            )
+        return
+
+    if file_format not in ("parquet", "arrow"):
+        raise ValueError(f"unknown file format '{file_format}'")
+
+    pa = _import_pyarrow()
+    if file_format == "parquet":
+        parquet_file = pa.parquet.ParquetFile(file_path)
+        if chunksize is None:
+            tables = [parquet_file.read()]
+        else:
+            tables = (
+                pa.Table.from_batches([batch])
+                for batch in parquet_file.iter_batches(batch_size=chunksize)
+            )
+    else:
+        # Memory map the file, so that chunks are zero-copy slices
+        table = pa.ipc.open_file(pa.memory_map(str(file_path))).read_all()
+        if chunksize is None:
+            tables = [table]
+        else:
+            tables = (
+                pa.Table.from_batches([batch])
+                for batch in table.to_batches(max_chunksize=chunksize)
+            )
+
+    for table in tables:
+        df = table.to_pandas()
+        if index_col is not None:
+            df = df.set_index(index_col)
+        yield df
@@ -17,15 +17,26 @@ import param
 import pathlib
 
 from collections import namedtuple
+from functools import partial
 from hydra.utils import instantiate
 from omegaconf import DictConfig, OmegaConf
+from sqlalchemy.orm import Session
 from typing import TYPE_CHECKING
 
 # Database imports
 from . import models
 
+# Shared state
+from . import state
+
+# File formats
+from . import formats
+
+# Menu files processing
+from . import ocr
+
 # Auth
-from .auth import AuthUser
+from .auth import AuthUser, privileged_users_cache
 
 # Import used only for type checking, that have problems with circular imports
 # TYPE_CHECKING is False at runtime (thus the import is not executed)
@@ -250,12 +261,17 @@ _Guest users_ shall use a valid _unique_ name and select a guest type.
 
 upload_text: str = """
 ### Menu Upload
-Select a .png, .jpg or .xlsx file with the menu.<br>
+Select a {extensions} file with the menu.<br>
 The app may add some default items to the menu.
 
 **For .xlsx:** list menu items starting from cell A1, one per each row.
 """
-"""info Text used in `Menu Upload` tab."""
+"""info Text used in `Menu Upload` tab (`extensions` is filled with accepted extensions)."""
+
+upload_pdf_text: str = """
+**For .pdf:** pages with text are read directly, scanned pages are processed like images.
+"""
+"""info Text added to `Menu Upload` tab if PDF files are accepted."""
 
 download_text: str = """
 ### Download Orders
@@ -409,6 +425,8 @@ class GraphicInterface:
                     id=f"{self.auth_user.name}_guest_override",
                     value=toggle,
                 )
+                # The guest override flag is part of the user profile
+                self.auth_user.get_profile(refresh=True)
             # Show banner if override is active
             self.guest_override_alert.visible = toggle
             # Simply reload the menu when the toggle button value changes
@@ -660,10 +678,25 @@ class GraphicInterface:
         def reload_on_no_more_order_callback(
             toggle: pnw.Toggle, reload: bool = True
         ):
-            # Update global variable
-            self.waiter.database_connector.set_flag(
-                id="no_more_orders", value=toggle
+            # Update global variable (only if changed, toggles set to sync
+            # this session with the database are not notified)
+            # The current value is read from the shared lunch snapshot
+            snapshot = state.lunch_state.get_snapshot(
+                builder=lambda version: self.waiter.build_lunch_snapshot(
+                    version=version
+                )
             )
+            if snapshot.no_more_orders != toggle:
+                self.waiter.database_connector.set_flag(
+                    id="no_more_orders", value=toggle
+                )
+                # Push the new value to the other sessions (the flag is part
+                # of the lunch snapshot)
+                state.notify_change(topic="no_more_orders")
+            else:
+                # Toggle synced with the database by reload_menu, that is
+                # already reloading the menu
+                reload = False
 
             # Show "no more order" text
             self.no_more_order_alert.visible = toggle
@@ -674,11 +707,9 @@ class GraphicInterface:
             self.change_order_time_takeaway_button.disabled = toggle
 
             # Simply reload the menu when the toggle button value changes
+            # Selections not sent yet are kept
             if reload:
-                self.waiter.reload_menu(
-                    None,
-                    self,
-                )
+                self.waiter.reload_menu(None, self, keep_selections=True)
 
         # Add callback to attribute
         self.reload_on_no_more_order = reload_on_no_more_order_callback
@@ -763,8 +794,18 @@ class GraphicInterface:
             width=sidebar_content_width,
         )
         # File upload
+        # PDF files are accepted only if pypdfium2 is installed
+        menu_extensions = list(ocr.IMAGE_EXTENSIONS)
+        if ocr.is_pdf_supported():
+            menu_extensions.extend(ocr.PDF_EXTENSIONS)
+        menu_extensions.append(".xlsx")
+        self.upload_text = upload_text.format(
+            extensions=f"{', '.join(menu_extensions[:-1])} or {menu_extensions[-1]}"
+        )
+        if ocr.is_pdf_supported():
+            self.upload_text += upload_pdf_text
         self.file_widget = pnw.FileInput(
-            accept=".png,.jpg,.jpeg,.xlsx", sizing_mode="stretch_width"
+            accept=",".join(menu_extensions), sizing_mode="stretch_width"
         )
         # Stats table
         # Create stats table (non-editable)
@@ -825,6 +866,14 @@ class GraphicInterface:
             icon="tools-kitchen-2",
             icon_size="2em",
         )
+        # Menu build progress (shown while the menu file is processed)
+        self.build_menu_progress = pn.indicators.Progress(
+            name="Menu processing",
+            value=-1,
+            active=False,
+            visible=False,
+            sizing_mode="stretch_width",
+        )
         # Download button and callback
         self.download_button = pn.widgets.FileDownload(
             callback=lambda: self.waiter.download_dataframe(self),
@@ -833,6 +882,32 @@ class GraphicInterface:
             icon="download",
             icon_size="2em",
         )
+        # Parquet download buttons (only if pyarrow is installed)
+        if (
+            self.config.panel.parquet_export.enabled
+            and formats.is_pyarrow_available()
+        ):
+            self.download_orders_parquet_button = pn.widgets.FileDownload(
+                callback=self.waiter.download_orders_parquet,
+                filename=self.config.panel.parquet_export.orders_file_name,
+                label="Download Parquet",
+                button_style="outline",
+                sizing_mode="stretch_width",
+                icon="file-analytics",
+                icon_size="2em",
+            )
+            self.download_stats_parquet_button = pn.widgets.FileDownload(
+                callback=self.waiter.download_stats_parquet,
+                filename=self.config.panel.parquet_export.stats_file_name,
+                label="Download Parquet",
+                button_style="outline",
+                sizing_mode="stretch_width",
+                icon="file-analytics",
+                icon_size="2em",
+            )
+        else:
+            self.download_orders_parquet_button = None
+            self.download_stats_parquet_button = None
         # Birthday buttons
         self.submit_birthday_button = pnw.Button(
             name="Submit",
@@ -878,11 +953,12 @@ class GraphicInterface:
             pn.pane.HTML(),
         )
 
-        # Create column for uploading image/Excel with the menu
+        # Create column for uploading image/PDF/Excel with the menu
         self.sidebar_menu_upload_col = pn.Column(
-            upload_text,
+            self.upload_text,
             self.file_widget,
             self.build_menu_button,
+            self.build_menu_progress,
             name="🍕 Menu",
             width=sidebar_content_width,
         )
@@ -893,6 +969,10 @@ class GraphicInterface:
             name="🛎️ Orders",
             width=sidebar_content_width,
         )
+        if self.download_orders_parquet_button is not None:
+            self.sidebar_download_orders_col.append(
+                self.download_orders_parquet_button
+            )
         # Create column for statistics
         self.sidebar_stats_col = pn.Column(
             name="📊 Stats", width=sidebar_content_width
@@ -941,13 +1021,9 @@ class GraphicInterface:
         )
 
         # CALLBACKS
-        # Build menu button callback
+        # Build menu button callback (asynchronous, OCR runs in worker processes)
         self.build_menu_button.on_click(
-            lambda e: self.waiter.build_menu(
-                e,
-                app,
-                self,
-            )
+            partial(self.waiter.build_menu, app=app, gi=self)
         )
         # Submit birthday button callback
         self.submit_birthday_button.on_click(
@@ -964,6 +1040,20 @@ class GraphicInterface:
             lambda e: self.auth_context.submit_password(gi=self)
         )
 
+        # LIVE UPDATES --------------------------------------------------------
+        # Reload this session when other sessions change orders, menu or the
+        # "no more orders" flag (the reload uses the shared lunch snapshot)
+        # Selections not sent yet are kept, so that users do not lose them
+        if self.config.panel.live_updates.enabled:
+            change_feed_token = state.change_feed.subscribe(
+                lambda event: self.waiter.reload_menu(
+                    None, self, keep_selections=True
+                )
+            )
+            pn.state.on_session_destroyed(
+                lambda ctx: state.change_feed.unsubscribe(change_feed_token)
+            )
+
     # UTILITY METHODS ---------------------------------------------------------
     # NAVBAR
     def open_backend(self) -> None:
@@ -1158,6 +1248,7 @@ class GraphicInterface:
         version: str,
         host_name: str,
         stylesheets: list = [],
+        session: Session | None = None,
     ) -> dict:
         """Build text used for statistics under the `stats` tab, and info under the `user` tab.
 
@@ -1171,6 +1262,8 @@ class GraphicInterface:
             host_name (str): host name.
             stylesheets (list, optional): Stylesheets to assign to the resulting HTML pane
                 (see `Panel docs <https://panel.holoviz.org/how_to/styling/apply_css.html>`__). Defaults to [].
+            session (Session | None, optional): SQLAlchemy session used to check user privileges.
+                If `None` a new session is created. Defaults to None.
 
         Returns:
             dict: _description_
@@ -1194,9 +1287,9 @@ class GraphicInterface:
             stylesheets=stylesheets,
         )
         # Define user group
-        if auth_user.is_guest(allow_override=False):
+        if auth_user.is_guest(allow_override=False, session=session):
             user_group = "guest"
-        elif auth_user.is_admin():
+        elif auth_user.is_admin(session=session):
             user_group = "admin"
         else:
             user_group = "user"
@@ -1265,6 +1358,25 @@ class GraphicInterface:
 
         return {"stats": stats, "info": other_info}
 
+    def show_build_menu_progress(
+        self, active: bool, value: int = -1, max: int = 100
+    ) -> None:
+        """Show (or hide) the menu build progress bar.
+
+        The build menu button is disabled while the menu is processed.
+
+        Args:
+            active (bool): `True` if the menu is being processed.
+            value (int, optional): progress value (-1 for an indeterminate progress).
+                Defaults to -1.
+            max (int, optional): progress value at completion. Defaults to 100.
+        """
+        self.build_menu_progress.max = max
+        self.build_menu_progress.value = value if active else -1
+        self.build_menu_progress.active = active
+        self.build_menu_progress.visible = active
+        self.build_menu_button.disabled = active
+
     def submit_birthday_button_callback(
         self, person_birthday: PersonBirthday
     ) -> None:
@@ -1278,6 +1390,10 @@ class GraphicInterface:
                     first_name=person_birthday.first_name,
                     last_name=person_birthday.last_name,
                 )
+                # Birthdays are part of the lunch data shared by all sessions
+                state.notify_change(topic="birthdays")
+                # Birthday presence is part of the user profile
+                self.auth_user.get_profile(refresh=True)
             except Exception as e:
                 # Notify error
                 pn.state.notifications.error(
@@ -1311,6 +1427,10 @@ class GraphicInterface:
                     username=self.auth_user.name,
                 )
             )
+            # Birthdays are part of the lunch data shared by all sessions
+            state.notify_change(topic="birthdays")
+            # Birthday presence is part of the user profile
+            self.auth_user.get_profile(refresh=True)
         except Exception as e:
             # Notify error
             pn.state.notifications.error(
@@ -1687,6 +1807,9 @@ class BackendInterface:
         """Reload backend by updating user lists and privileges.
         Read also flags from `flags` table.
         """
+        # Drop cached privileged users, so that changes made by other
+        # processes (e.g. the CLI) are applied at once
+        privileged_users_cache.invalidate()
         # Users and guests lists
         self.users_tabulator.value = (
             self.auth_context.list_users_guests_and_privileges()
@@ -5,6 +5,8 @@ Helper classes and utility functions for data management are defined here.
 
 import datetime
 import hydra
+from collections.abc import Iterator
+from contextlib import contextmanager
 import logging
 from omegaconf import DictConfig
 import pathlib
@@ -20,9 +22,11 @@ from sqlalchemy import (
     TypeDecorator,
     Date,
     Boolean,
+    Float,
     Identity,
     event,
     MetaData,
+    Table,
     delete,
     text,
 )
@@ -39,6 +43,7 @@ from sqlalchemy.sql import func
 from sqlalchemy.sql import false as sql_false
 from sqlalchemy.dialects.postgresql import insert as postgresql_upsert
 import tenacity
+import threading
 import os
 
 # Authentication
@@ -58,6 +63,16 @@ _MODULE_TO_DIALECT_MAP: dict = {
 }
 """Dictionary with mappings from python module name to dialect."""
 
+_ENGINES_REGISTRY: dict[tuple, Engine] = {}
+"""Process-wide registry of SQLAlchemy engines.
+
+Keys are tuples with the database URL and the schema translate map, so every
+`DatabaseConnector` with the same configuration shares the same engine (and
+its connection pool).
+"""
+_ENGINES_REGISTRY_LOCK: threading.Lock = threading.Lock()
+"""Lock used to avoid creating the same engine twice from different threads."""
+
 # Add schema to default metadata (only if requested)
 # Read directly from environment variable because config is not available here
 # If config.db.schema is available SCHEMA value is overridden by the value
@@ -282,62 +297,135 @@ class CommonTable(Data):
         return num_rows_deleted.rowcount
 
     @classmethod
-    def read_as_df(self, config: DictConfig, **kwargs) -> pd.DataFrame:
+    def read_as_df(
+        self, config: DictConfig, session: Session | None = None, **kwargs
+    ) -> pd.DataFrame:
         """Read table as pandas DataFrame.
 
         Args:
             config (DictConfig): Hydra configuration dictionary.
+            session (Session | None, optional): SQLAlchemy session used to run the query.
+                If `None` the query runs on the engine. Defaults to None.
 
         Returns:
             pd.DataFrame: dataframe with table content.
         """
+        # Use the session connection (if available) to share its transaction
+        if session is not None:
+            con = session.connection()
+        else:
+            con = DatabaseConnector(config=config).create_engine()
         df = pd.read_sql_table(
             table_name=self.__tablename__,
-            con=DatabaseConnector(config=config).create_engine(),
+            con=con,
             schema=config.db.get("schema", SCHEMA),
             **kwargs,
         )
         return df
 
+    @classmethod
+    def read_as_df_chunks(
+        self, config: DictConfig, chunksize: int, **kwargs
+    ) -> Iterator[pd.DataFrame]:
+        """Read table as an iterator of pandas DataFrames.
+
+        Rows are streamed from the database (server-side cursor where
+        available), so that only one chunk at a time is kept in memory.
+        The index is continuous across chunks.
+
+        Args:
+            config (DictConfig): Hydra configuration dictionary.
+            chunksize (int): number of rows of each dataframe.
+
+        Yields:
+            Iterator[pd.DataFrame]: dataframes with table content.
+        """
+        engine = DatabaseConnector(config=config).create_engine()
+        with engine.connect().execution_options(
+            stream_results=True, yield_per=chunksize
+        ) as con:
+            start = 0
+            for df in pd.read_sql_table(
+                table_name=self.__tablename__,
+                con=con,
+                schema=config.db.get("schema", SCHEMA),
+                chunksize=chunksize,
+                **kwargs,
+            ):
+                if "index_col" not in kwargs:
+                    df.index = pd.RangeIndex(start, start + len(df))
+                start += len(df)
+                yield df
+
     @classmethod
     def write_from_df(
-        self, config: DictConfig, df: pd.DataFrame, index: bool = True
+        self,
+        config: DictConfig,
+        df: pd.DataFrame,
+        index: bool = True,
+        batch_size: int | None = None,
     ) -> int:
         """Write table from pandas DataFrame.
 
         If a record already exists in the table, it will be updated.
 
+        Rows are written in batches, with one multi-row upsert statement for
+        each batch (see `DatabaseConnector.session_bulk_upsert`).
+        Null values are not written (columns defaults are used instead).
+
         Args:
             config (DictConfig): Hydra configuration dictionary.
             df (pd.DataFrame): dataframe with table content.
             index (bool): write index as a column. Use False to ignore index. Defaults to True.
+            batch_size (int | None, optional): rows written by each statement.
+                If `None` the value is taken from `config.db.bulk_write.batch_size`.
+                Defaults to None.
 
         Returns:
             int: number of rows written.
         """
-
-        session = DatabaseConnector(config=config).create_session()
-        # Convert the dataframe to a dictionary of records
+        batch_size = batch_size or config.db.bulk_write.batch_size
         drop_index = not index
-        records_dict = df.reset_index(drop=drop_index).to_dict(
-            orient="records"
+        df = df.reset_index(drop=drop_index)
+        # A multi-row upsert cannot update the same row twice, so keep only
+        # the last duplicated primary key (as with one upsert for each row)
+        primary_key = [c.name for c in self.__table__.primary_key.columns]
+        if set(primary_key).issubset(df.columns):
+            df = df.drop_duplicates(subset=primary_key, keep="last")
+        # Convert the dataframe to a dictionary of records (NaNs to None)
+        records_dict = (
+            df.astype(object).where(df.notna(), None).to_dict(orient="records")
         )
 
+        session = DatabaseConnector(config=config).create_session()
         with session:
-            # Add rows
-            for record in records_dict:
-                # Convert the tuple to dict and expand to avoid errors
-                new_record = self(**record)
-                DatabaseConnector.session_add_with_upsert(
-                    session=session,
-                    constraint=f"{self.__tablename__}_pkey",
-                    new_record=new_record,
-                )
+            for start in range(0, len(records_dict), batch_size):
+                # Records of a statement shall have the same columns, so
+                # group them by not null columns
+                groups: dict[tuple, list[dict]] = {}
+                for record in records_dict[start : start + batch_size]:
+                    not_null_record = {
+                        k: v for k, v in record.items() if v is not None
+                    }
+                    groups.setdefault(tuple(not_null_record), []).append(
+                        not_null_record
+                    )
+                for records in groups.values():
+                    DatabaseConnector.session_bulk_upsert(
+                        session=session,
+                        table=self.__table__,
+                        constraint=f"{self.__tablename__}_pkey",
+                        records=records,
+                    )
 
             # Commit only at the end
             session.commit()
 
-        return len(df)
+        log.debug(
+            f"{len(records_dict)} rows written to table '{self.__tablename__}' (batch size {batch_size})"
+        )
+
+        return len(records_dict)
 
 
 class Menu(CommonTable):
@@ -678,6 +766,72 @@ class Credentials(CommonTable):
         return getattr(type(self), key).type.validator(password)
 
 
+class LoginBuckets(CommonTable):
+    """Table with token buckets used to throttle login attempts.
+
+    Used only if basic authentication is active and login throttling is
+    shared between processes (see `basic_auth.login_throttling`).
+    """
+
+    __tablename__ = "login_buckets"
+    """Name of the table."""
+    id = Column(
+        String(150),
+        primary_key=True,
+        nullable=False,
+    )
+    """Bucket ID (username or IP address, with a prefix)."""
+    tokens = Column(Float, nullable=False)
+    """Available tokens (at the last update)."""
+    updated_at = Column(Float, nullable=False)
+    """Last update (UNIX timestamp)."""
+
+    def __repr__(self) -> str:
+        """Simple object representation.
+
+        Returns:
+            str: string representation.
+        """
+        return f"<LOGIN_BUCKET:{self.id} - tokens:{self.tokens}>"
+
+
+class TaskLocks(CommonTable):
+    """Table with locks used to run each scheduled task once across processes.
+
+    Used only by tasks with `single_runner` enabled (see
+    `scheduled_tasks.TaskLock`), the last lock holder is kept for
+    observability.
+    """
+
+    __tablename__ = "task_locks"
+    """Name of the table."""
+    id = Column(
+        String(100),
+        primary_key=True,
+        nullable=False,
+    )
+    """Task name."""
+    holder = Column(String(200), nullable=True)
+    """Process that holds (or held) the lock (hostname and PID)."""
+    acquired_at = Column(Float, nullable=False)
+    """Last acquisition (UNIX timestamp)."""
+    released_at = Column(Float, nullable=True)
+    """Last release (UNIX timestamp, `None` while the task is running)."""
+    expires_at = Column(Float, nullable=False)
+    """Time after which a lock that was not released is considered stale
+    (UNIX timestamp)."""
+    next_run_at = Column(Float, nullable=False)
+    """Time from which the next run can acquire the lock (UNIX timestamp)."""
+
+    def __repr__(self) -> str:
+        """Simple object representation.
+
+        Returns:
+            str: string representation.
+        """
+        return f"<TASK_LOCK:{self.id} - holder:{self.holder}>"
+
+
 # DATABASE CONNECTOR ----------------------------------------------------------
 class DatabaseConnector:
     """Class for handling database connections and operations."""
@@ -744,6 +898,30 @@ class DatabaseConnector:
         )
         session.execute(upsert_statement)
 
+    @staticmethod
+    def session_bulk_upsert(
+        session: Session, table: Table, constraint: str, records: list[dict]
+    ) -> None:
+        """Use a single multi-row upsert statement to add many records to a
+        table, for both Postgresql and SQLite databases.
+
+        Args:
+            session (Session): SQLAlchemy session object.
+            table (Table): SQLAlchemy table.
+            constraint (str): constraint used for upsert (usually the primary key)
+            records (list[dict]): records to add (all records shall have the
+                same keys, and keys shall be columns names).
+        """
+        insert_statement = postgresql_upsert(table).values(records)
+        upsert_statement = insert_statement.on_conflict_do_update(
+            constraint=constraint,
+            set_={
+                column.name: getattr(insert_statement.excluded, column.name)
+                for column in insert_statement.excluded
+            },
+        )
+        session.execute(upsert_statement)
+
     @staticmethod
     def read_sql_query(session: Session, query: str) -> pd.DataFrame:
         """Read a SQL query as pandas DataFrame.
@@ -766,21 +944,54 @@ class DatabaseConnector:
     def create_engine(self) -> Engine:
         """Factory function for SQLAlchemy engine.
 
+        Engines are stored in a process-wide registry (keyed by database URL
+        and schema translate map), so the same engine and connection pool are
+        returned to every caller sharing the same database configuration.
+
         Returns:
             Engine: SQLAlchemy engine.
         """
-        engine = hydra.utils.instantiate(self.config.db.engine)
-
         # Change schema with change_execution_options
         # If schema exist in config.db it will override the schema selected through
         # the environment variable
         if "schema" in self.config.db:
-            engine.update_execution_options(
-                schema_translate_map={SCHEMA: self.config.db.schema}
-            )
+            schema_translate_map = {SCHEMA: self.config.db.schema}
+        else:
+            schema_translate_map = None
+
+        # Build the registry key
+        registry_key = (
+            str(self.config.db.engine.url),
+            tuple(sorted((schema_translate_map or {}).items(), key=str)),
+        )
+
+        with _ENGINES_REGISTRY_LOCK:
+            engine = _ENGINES_REGISTRY.get(registry_key, None)
+            if engine is None:
+                engine = hydra.utils.instantiate(self.config.db.engine)
+                if schema_translate_map is not None:
+                    engine.update_execution_options(
+                        schema_translate_map=schema_translate_map
+                    )
+                _ENGINES_REGISTRY[registry_key] = engine
+                log.debug(
+                    f"new engine added to registry ({engine.pool.status()})"
+                )
 
         return engine
 
+    @staticmethod
+    def dispose_engines() -> None:
+        """Dispose all engines stored in the process-wide registry and empty it.
+
+        Connections checked out from the pools are closed when returned.
+        """
+        with _ENGINES_REGISTRY_LOCK:
+            for engine in _ENGINES_REGISTRY.values():
+                engine.dispose()
+            _ENGINES_REGISTRY.clear()
+        log.debug("engines registry cleared")
+
     def create_session(self) -> Session:
         """Factory function for database session.
 
@@ -792,6 +1003,29 @@ class DatabaseConnector:
 
         return session
 
+    @contextmanager
+    def session_scope(
+        self, session: Session | None = None
+    ) -> Iterator[Session]:
+        """Context manager that returns the given session or a new one.
+
+        It is used to run many operations inside the same unit of work: if a
+        session is passed it is used as is (and it is left open, the caller
+        owns it), otherwise a new session is created and closed on exit.
+
+        Args:
+            session (Session | None, optional): SQLAlchemy session to reuse. Defaults to None.
+
+        Yields:
+            Session: SQLAlchemy session.
+        """
+        if session is not None:
+            yield session
+        else:
+            new_session = self.create_session()
+            with new_session:
+                yield new_session
+
     def create_database(self, add_basic_auth_users=False) -> None:
         """Function to create the database through SQLAlchemy models.
 
@@ -885,7 +1119,10 @@ class DatabaseConnector:
         log.debug(f"set flag '{id}' to {value}")
 
     def get_flag(
-        self, id: str, value_if_missing: bool | None = None
+        self,
+        id: str,
+        value_if_missing: bool | None = None,
+        session: Session | None = None,
     ) -> bool | None:
         """Get the value of a flag.
         Optionally select the values to return if the flag is missing (default to None).
@@ -893,14 +1130,14 @@ class DatabaseConnector:
         Args:
             id (str): flag ID (name).
             value_if_missing (bool | None, optional): value to return if the flag does not exist. Defaults to None.
+            session (Session | None, optional): SQLAlchemy session to reuse.
+                If `None` a new session is created. Defaults to None.
 
         Returns:
             bool | None: flag value.
         """
 
-        session = self.create_session()
-
-        with session:
+        with self.session_scope(session) as session:
             flag = session.get(Flags, id)
             if flag is None:
                 value = value_if_missing
@@ -944,20 +1181,21 @@ class DatabaseConnector:
 
         log.debug(f"set birthday data for user '{username}'")
 
-    def get_user_birthday(self, username: str) -> Birthdays:
+    def get_user_birthday(
+        self, username: str, session: Session | None = None
+    ) -> Birthdays:
         """Set birthday for a specific user.
 
         Args:
             username (str): user ID (name).
-            birthday_date (bool): birthday date.
+            session (Session | None, optional): SQLAlchemy session to reuse.
+                If `None` a new session is created. Defaults to None.
 
         Returns:
             Birthdays: birthday record for the user.
         """
 
-        session = self.create_session()
-
-        with session:
+        with self.session_scope(session) as session:
             birthday = session.get(Birthdays, username)
 
         return birthday
@@ -0,0 +1,433 @@
+"""Module with notifiers used to share lunch data changes between processes.
+
+Every process keeps its own lunch snapshot and change feed (see the `state`
+module). When Data-Lunch runs on more than one process (e.g. with
+`--num-procs` or with many replicas behind a load balancer) notifiers send a
+message to the other processes every time the lunch data changes, so that
+they can invalidate their snapshot and update their live sessions.
+
+Notifiers are selected by the configuration key `db.notifier`.
+"""
+
+import abc
+import json
+import logging
+import os
+import pathlib
+import psycopg
+import threading
+import uuid
+
+from omegaconf import DictConfig
+from psycopg import sql
+from sqlalchemy import func, select
+from typing import Any, Callable
+
+# fcntl is not available on Windows (writes to the shared file of the SQLite
+# notifier are not serialized)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Database imports
+from . import models
+
+# LOGGER ----------------------------------------------------------------------
+log: logging.Logger = logging.getLogger(__name__)
+"""Module logger."""
+
+
+# PROCESS ID ------------------------------------------------------------------
+_PROCESS_IDS: dict[int, str] = {}
+"""Random IDs of the current process (keys are PIDs, so that forked processes
+do not share the same ID)."""
+
+
+def get_process_id() -> str:
+    """Return a random ID that identifies the current process.
+
+    Returns:
+        str: process ID.
+    """
+    return _PROCESS_IDS.setdefault(os.getpid(), uuid.uuid4().hex)
+
+
+# CLASSES ---------------------------------------------------------------------
+class Notifier:
+    """Generic notifier.
+
+    Changes are not shared with other processes: use this notifier if
+    Data-Lunch runs on a single process.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+    """
+
+    def __init__(self, config: DictConfig) -> None:
+        self.config: DictConfig = config
+        """Hydra configuration dictionary."""
+        self.on_change: Callable[[str, bool], None] | None = None
+        """Function called when another process notifies a change.
+        It takes the topic and the bump version flag."""
+
+    def notify(self, topic: str, bump_version: bool = True) -> None:
+        """Notify a change to the other processes.
+
+        Args:
+            topic (str): what changed (e.g. `orders`, `menu`, `no_more_orders`).
+            bump_version (bool, optional): `True` if the change affects the
+                lunch snapshot. Defaults to True.
+        """
+        log.debug(f"change '{topic}' not shared with other processes")
+
+    def start(self, on_change: Callable[[str, bool], None]) -> None:
+        """Start listening for changes made by other processes.
+
+        Args:
+            on_change (Callable[[str, bool], None]): function called with the
+                topic and the bump version flag of every received change.
+        """
+        self.on_change = on_change
+
+    def stop(self) -> None:
+        """Stop listening for changes made by other processes."""
+
+    @staticmethod
+    def build_payload(topic: str, bump_version: bool, **kwargs) -> str:
+        """Build the message sent to the other processes.
+
+        Args:
+            topic (str): what changed.
+            bump_version (bool): `True` if the change affects the lunch snapshot.
+            kwargs (dict): additional message fields.
+
+        Returns:
+            str: JSON payload.
+        """
+        return json.dumps(
+            {
+                "origin": get_process_id(),
+                "topic": topic,
+                "bump_version": bump_version,
+                **kwargs,
+            }
+        )
+
+    @staticmethod
+    def parse_payload(payload: str) -> dict[str, Any] | None:
+        """Parse a received message.
+
+        Args:
+            payload (str): JSON payload.
+
+        Returns:
+            dict[str, Any] | None: message (`None` if the payload is invalid).
+        """
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            log.warning(f"invalid change notification payload '{payload}'")
+            return None
+        if not isinstance(message, dict):
+            log.warning(f"invalid change notification payload '{payload}'")
+            return None
+
+        return message
+
+    def handle_payload(self, payload: str) -> None:
+        """Parse a received message and call `on_change`.
+
+        Messages sent by this process are ignored.
+
+        Args:
+            payload (str): JSON payload.
+        """
+        message = self.parse_payload(payload)
+        if message is None or message.get("origin") == get_process_id():
+            return
+        self.handle_message(message)
+
+    def handle_message(self, message: dict[str, Any]) -> None:
+        """Call `on_change` with the content of a received message.
+
+        Args:
+            message (dict[str, Any]): parsed message.
+        """
+        log.debug(f"change '{message.get('topic')}' received")
+        if self.on_change is not None:
+            self.on_change(
+                message.get("topic", "unknown"),
+                message.get("bump_version", True),
+            )
+
+
+class _ThreadedNotifier(Notifier, abc.ABC):
+    """Base class for notifiers that listen on a background thread.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+    """
+
+    def __init__(self, config: DictConfig) -> None:
+        super().__init__(config)
+        self._thread: threading.Thread | None = None
+        """Listener thread."""
+        self._thread_pid: int | None = None
+        """PID of the process that started the listener thread."""
+        self._stop_event: threading.Event = threading.Event()
+        """Event used to stop the listener thread."""
+
+    def start(self, on_change: Callable[[str, bool], None]) -> None:
+        """Start the listener thread (only once per process).
+
+        Args:
+            on_change (Callable[[str, bool], None]): function called with the
+                topic and the bump version flag of every received change.
+        """
+        super().start(on_change)
+        # Threads do not survive a fork, so check also the PID
+        if (
+            self._thread is not None
+            and self._thread.is_alive()
+            and self._thread_pid == os.getpid()
+        ):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._listen,
+            name=f"{type(self).__name__.lower()}_listener",
+            daemon=True,
+        )
+        self._thread_pid = os.getpid()
+        self._thread.start()
+        log.info(f"{type(self).__name__} listening for changes")
+
+    def stop(self) -> None:
+        """Stop the listener thread."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    @abc.abstractmethod
+    def _listen(self) -> None:
+        """Listener loop (runs on a background thread)."""
+
+
+class PostgresqlNotifier(_ThreadedNotifier):
+    """Notifier based on PostgreSQL `LISTEN/NOTIFY`.
+
+    A dedicated connection (outside of the connection pool) listens on the
+    selected channel.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+        channel (str, optional): notification channel. Defaults to `"data_lunch_changes"`.
+        timeout (float, optional): seconds between checks of the stop event
+            while waiting for notifications. Defaults to 1.
+        reconnect_wait (float, optional): seconds to wait before reconnecting
+            after a connection error. Defaults to 5.
+    """
+
+    def __init__(
+        self,
+        config: DictConfig,
+        channel: str = "data_lunch_changes",
+        timeout: float = 1,
+        reconnect_wait: float = 5,
+    ) -> None:
+        super().__init__(config)
+        self.channel: str = channel
+        """Notification channel."""
+        self.timeout: float = timeout
+        """Seconds between checks of the stop event."""
+        self.reconnect_wait: float = reconnect_wait
+        """Seconds to wait before reconnecting after a connection error."""
+
+    def notify(self, topic: str, bump_version: bool = True) -> None:
+        """Send a notification on the channel.
+
+        Args:
+            topic (str): what changed (e.g. `orders`, `menu`, `no_more_orders`).
+            bump_version (bool, optional): `True` if the change affects the
+                lunch snapshot. Defaults to True.
+        """
+        engine = models.DatabaseConnector(config=self.config).create_engine()
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    select(
+                        func.pg_notify(
+                            self.channel,
+                            self.build_payload(topic, bump_version),
+                        )
+                    )
+                )
+        except Exception as e:
+            # Notifications are not critical, the database is already updated
+            log.warning(f"unable to notify change '{topic}': {e}")
+
+    def _listen(self) -> None:
+        """Listen on the channel and reconnect on errors."""
+        engine = models.DatabaseConnector(config=self.config).create_engine()
+        # Remove the driver from url (psycopg accepts only postgresql://)
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        while not self._stop_event.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as connection:
+                    connection.execute(
+                        sql.SQL("LISTEN {}").format(
+                            sql.Identifier(self.channel)
+                        )
+                    )
+                    log.debug(f"listening on channel '{self.channel}'")
+                    while not self._stop_event.is_set():
+                        for notification in connection.notifies(
+                            timeout=self.timeout
+                        ):
+                            self.handle_payload(notification.payload)
+            except psycopg.Error as e:
+                log.warning(
+                    f"change listener connection error, retry in {self.reconnect_wait}s: {e}"
+                )
+                self._stop_event.wait(self.reconnect_wait)
+
+
+class SQLiteNotifier(_ThreadedNotifier):
+    """Notifier based on a file polled by every process.
+
+    SQLite has no notification system, so every change is written to a
+    small file placed next to the database, and listeners poll its
+    modification time.
+
+    The file holds only the last change, together with a counter increased
+    by every change (writes are serialized by a lock file). If listeners
+    find that the counter skipped some values, changes were overwritten
+    before they could be read: the lunch snapshot is invalidated whatever the
+    origin of the last change.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+        path (str): path of the file used to share changes.
+        poll_interval (float, optional): seconds between checks. Defaults to 2.
+    """
+
+    def __init__(
+        self, config: DictConfig, path: str, poll_interval: float = 2
+    ) -> None:
+        super().__init__(config)
+        self.path: pathlib.Path = pathlib.Path(path)
+        """Path of the file used to share changes."""
+        self.poll_interval: float = poll_interval
+        """Seconds between checks."""
+
+    @property
+    def lock_path(self) -> pathlib.Path:
+        """Path of the lock file used to serialize writes."""
+        return self.path.with_name(f"{self.path.name}.lock")
+
+    def _read_message(self) -> dict[str, Any] | None:
+        """Read the last change from the shared file.
+
+        Returns:
+            dict[str, Any] | None: message (`None` if missing or invalid).
+        """
+        try:
+            payload = self.path.read_text()
+        except FileNotFoundError:
+            return None
+
+        return self.parse_payload(payload)
+
+    @staticmethod
+    def _get_counter(message: dict[str, Any] | None) -> int:
+        """Return the counter of a message.
+
+        Args:
+            message (dict[str, Any] | None): parsed message.
+
+        Returns:
+            int: change counter (0 if missing).
+        """
+        if message is None:
+            return 0
+        counter = message.get("counter", 0)
+
+        return counter if isinstance(counter, int) else 0
+
+    def notify(self, topic: str, bump_version: bool = True) -> None:
+        """Write the change to the shared file.
+
+        Args:
+            topic (str): what changed (e.g. `orders`, `menu`, `no_more_orders`).
+            bump_version (bool, optional): `True` if the change affects the
+                lunch snapshot. Defaults to True.
+        """
+        # Write to a temporary file and then replace the shared file, so
+        # that readers never see a partially written file
+        temp_path = self.path.with_name(
+            f"{self.path.name}.{get_process_id()}.tmp"
+        )
+        try:
+            with open(self.lock_path, "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                counter = self._get_counter(self._read_message()) + 1
+                temp_path.write_text(
+                    self.build_payload(topic, bump_version, counter=counter)
+                )
+                os.replace(temp_path, self.path)
+        except OSError as e:
+            # Notifications are not critical, the database is already updated
+            log.warning(f"unable to notify change '{topic}': {e}")
+
+    def _get_mtime(self) -> int | None:
+        """Return the modification time of the shared file.
+
+        Returns:
+            int | None: modification time in nanoseconds (`None` if the file does not exist).
+        """
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _listen(self) -> None:
+        """Poll the shared file and handle new changes."""
+        last_mtime = self._get_mtime()
+        try:
+            last_counter = self._get_counter(self._read_message())
+        except OSError:
+            last_counter = 0
+        while not self._stop_event.wait(self.poll_interval):
+            mtime = self._get_mtime()
+            if mtime is None or mtime == last_mtime:
+                continue
+            last_mtime = mtime
+            try:
+                message = self._read_message()
+            except OSError as e:
+                log.warning(f"unable to read change notification: {e}")
+                continue
+            if message is None:
+                continue
+            counter = self._get_counter(message)
+            if counter == last_counter + 1:
+                # Single new change: skip changes made by this process
+                if message.get("origin") != get_process_id():
+                    self.handle_message(message)
+            elif counter != last_counter:
+                # Some changes were overwritten (or the file was reset):
+                # invalidate the lunch snapshot in any case
+                log.debug(
+                    f"changes {last_counter + 1}-{counter} merged into '{message.get('topic')}'"
+                )
+                self.handle_message({**message, "bump_version": True})
+            last_counter = counter
+
+
+# FUNCTIONS -------------------------------------------------------------------
+# Intentionally left empty
@@ -0,0 +1,861 @@
+"""Module with functions used to extract menu items from images and PDF files.
+
+Tesseract is slow (several seconds for a photo of a menu), so OCR runs in a
+pool of worker processes: the Panel event loop is not blocked and the other
+sessions served by the same process keep working while a menu is processed.
+
+PDF files are read from their text layer, without OCR. Pages without text
+(e.g. scanned pages) are rendered and processed with OCR, one page for each
+worker. PDF support requires the optional dependency `pypdfium2` (install
+`dlunch[pdf]`).
+
+Extracted rows are stored in a disk cache (see `OcrCache`), so that a file
+uploaded again (e.g. after a restart) is not processed twice.
+
+Options are set by the configuration key `panel.menu_ocr`.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import numpy as np
+import os
+import pathlib
+import threading
+import uuid
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from omegaconf import DictConfig, OmegaConf
+from PIL import Image
+from pytesseract import pytesseract
+from typing import Any, Callable
+
+# LOGGER ----------------------------------------------------------------------
+log: logging.Logger = logging.getLogger(__name__)
+"""Module logger."""
+
+# MENU FILES ------------------------------------------------------------------
+IMAGE_EXTENSIONS: tuple[str, ...] = (".png", ".jpg", ".jpeg")
+"""Extensions of menu files processed with OCR."""
+PDF_EXTENSIONS: tuple[str, ...] = (".pdf",)
+"""Extensions of PDF menu files."""
+
+# PROCESS POOL ----------------------------------------------------------------
+_EXECUTORS: dict[int, ProcessPoolExecutor] = {}
+"""Process pools used for OCR (keys are PIDs, so that forked processes do not
+share the same pool)."""
+_executors_lock: threading.Lock = threading.Lock()
+"""Lock used to create a single process pool."""
+
+
+def get_executor(config: DictConfig) -> ProcessPoolExecutor:
+    """Return the process pool used for OCR.
+
+    The pool is created at first use and shared by all sessions of the
+    current process.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+
+    Returns:
+        ProcessPoolExecutor: process pool.
+    """
+    with _executors_lock:
+        executor = _EXECUTORS.get(os.getpid())
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=config.panel.menu_ocr.max_workers,
+                mp_context=multiprocessing.get_context(
+                    config.panel.menu_ocr.start_method
+                ),
+            )
+            _EXECUTORS[os.getpid()] = executor
+            log.info(
+                f"OCR process pool started ({config.panel.menu_ocr.max_workers or os.cpu_count()} workers)"
+            )
+
+    return executor
+
+
+def _drop_executor(executor: ProcessPoolExecutor) -> None:
+    """Remove a broken process pool, so that a new one is created at the next
+    request.
+
+    Args:
+        executor (ProcessPoolExecutor): broken process pool.
+    """
+    with _executors_lock:
+        if _EXECUTORS.get(os.getpid()) is executor:
+            del _EXECUTORS[os.getpid()]
+    executor.shutdown(wait=False, cancel_futures=True)
+    log.warning("OCR process pool is broken, it will be restarted")
+
+
+# CLASSES ---------------------------------------------------------------------
+class OcrCache:
+    """Content-addressed disk cache of menu items extracted from images.
+
+    Entries are JSON files named after a hash of the image bytes and of the
+    OCR options. The least recently used entries are evicted when the cache
+    exceeds the maximum number of entries or the maximum size.
+
+    Args:
+        folder (str | pathlib.Path): cache folder (created if missing).
+        max_entries (int): maximum number of entries.
+        max_size_mb (float): maximum size of the cache folder (MB).
+    """
+
+    def __init__(
+        self,
+        folder: str | pathlib.Path,
+        max_entries: int,
+        max_size_mb: float,
+    ) -> None:
+        self.folder: pathlib.Path = pathlib.Path(folder)
+        """Cache folder."""
+        self.max_entries: int = max_entries
+        """Maximum number of entries."""
+        self.max_size: int = int(max_size_mb * 1024**2)
+        """Maximum size of the cache folder (bytes)."""
+
+    @staticmethod
+    def build_key(image_path: str | pathlib.Path, options: dict) -> str:
+        """Return the cache key of an image.
+
+        Args:
+            image_path (str | pathlib.Path): path of the image file.
+            options (dict): OCR options that affect the extracted rows.
+
+        Returns:
+            str: cache key (SHA-256 hex digest).
+        """
+        with open(image_path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256")
+        digest.update(json.dumps(options, sort_keys=True).encode())
+
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        """Return the path of a cache entry.
+
+        Args:
+            key (str): cache key.
+
+        Returns:
+            pathlib.Path: entry path.
+        """
+        return self.folder / f"{key}.json"
+
+    def get(self, key: str) -> list[str] | None:
+        """Return cached rows.
+
+        Args:
+            key (str): cache key.
+
+        Returns:
+            list[str] | None: menu items (`None` if the key is missing).
+        """
+        entry_path = self._entry_path(key)
+        try:
+            rows = json.loads(entry_path.read_text())
+            # Update modification time (used to evict least recently used entries)
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+
+        return rows
+
+    def set(self, key: str, rows: list[str]) -> None:
+        """Store rows and evict old entries.
+
+        Args:
+            key (str): cache key.
+            rows (list[str]): menu items.
+        """
+        entry_path = self._entry_path(key)
+        # Write to a temporary file and then replace the entry, so that
+        # readers never see a partially written file
+        temp_path = entry_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        try:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            temp_path.write_text(json.dumps(rows))
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            # The cache is not critical, rows are already extracted
+            log.warning(f"unable to store OCR result in cache: {e}")
+            temp_path.unlink(missing_ok=True)
+            return
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits its
+        limits."""
+        entries = []
+        for entry_path in self.folder.glob("*.json"):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                # Removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        # Most recent first
+        entries.sort(reverse=True)
+        total_size = sum(size for _, size, _ in entries)
+        while entries and (
+            len(entries) > self.max_entries or total_size > self.max_size
+        ):
+            _, size, entry_path = entries.pop()
+            entry_path.unlink(missing_ok=True)
+            total_size -= size
+            log.debug(f"OCR cache entry {entry_path.name} evicted")
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        for entry_path in self.folder.glob("*.json"):
+            entry_path.unlink(missing_ok=True)
+
+
+# FUNCTIONS -------------------------------------------------------------------
+def get_cache(config: DictConfig) -> OcrCache | None:
+    """Return the OCR cache set by the configuration.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+
+    Returns:
+        OcrCache | None: OCR cache (`None` if the cache is disabled).
+    """
+    cache_config = config.panel.menu_ocr.cache
+    if not cache_config.enabled:
+        return None
+
+    return OcrCache(
+        folder=cache_config.folder,
+        max_entries=cache_config.max_entries,
+        max_size_mb=cache_config.max_size_mb,
+    )
+
+
+def get_ocr_options(config: DictConfig) -> dict:
+    """Return the OCR options that affect the extracted rows.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+
+    Returns:
+        dict: OCR options (used also as part of the cache key).
+    """
+    return {
+        "lang": config.panel.menu_ocr.lang,
+        "tesseract_config": config.panel.menu_ocr.tesseract_config,
+        "preprocessing": OmegaConf.to_container(
+            config.panel.menu_ocr.preprocessing, resolve=True
+        ),
+        "tiling": OmegaConf.to_container(
+            config.panel.menu_ocr.tiling, resolve=True
+        ),
+        "pdf": OmegaConf.to_container(config.panel.menu_ocr.pdf, resolve=True),
+    }
+
+
+def _otsu_threshold(pixels: np.ndarray) -> int:
+    """Compute the threshold that separates text from background (Otsu's method).
+
+    Args:
+        pixels (np.ndarray): grayscale pixels (uint8).
+
+    Returns:
+        int: threshold (pixels below the threshold are text).
+    """
+    hist = np.bincount(pixels.ravel(), minlength=256).astype(float)
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    cum_mean = np.cumsum(hist * levels)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_bg = cum_mean / weight_bg
+        mean_fg = (cum_mean[-1] - cum_mean) / weight_fg
+        between_var = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+
+    if np.isnan(between_var).all():
+        # Uniform image (no text)
+        return 0
+
+    return int(np.nanargmax(between_var)) + 1
+
+
+def _flatten_alpha(img: Image.Image) -> Image.Image:
+    """Paste an image with transparency onto a white background.
+
+    Converting to grayscale drops the alpha channel, so that transparent
+    backgrounds (common in screenshots) would turn black. Tesseract does the
+    same flattening on the images it receives.
+
+    Args:
+        img (Image.Image): input image.
+
+    Returns:
+        Image.Image: RGB image (the input image if it has no transparency).
+    """
+    if img.mode == "PA" or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+    if img.mode not in ("RGBA", "LA"):
+        return img
+    background = Image.new("RGB", img.size, "white")
+    background.paste(img, mask=img.getchannel("A"))
+
+    return background
+
+
+def _estimate_skew(img: Image.Image, max_angle: float, step: float) -> float:
+    """Estimate the rotation that aligns text rows to the horizontal axis.
+
+    The best angle maximizes the variance of the rows profile (number of text
+    pixels in each row), computed on a reduced copy of the image.
+
+    Args:
+        img (Image.Image): input image.
+        max_angle (float): maximum absolute angle checked (degrees).
+        step (float): angle step (degrees).
+
+    Returns:
+        float: rotation angle (degrees, counter-clockwise).
+    """
+    small = _flatten_alpha(img).convert("L")
+    small.thumbnail((800, 800))
+    pixels = np.asarray(small)
+    text_mask = Image.fromarray(
+        ((pixels < _otsu_threshold(pixels)) * 255).astype(np.uint8)
+    )
+    best_angle, best_score = 0.0, -1.0
+    # Smallest rotations first, so that they are preferred in case of ties
+    angles = sorted(np.arange(-max_angle, max_angle + step / 2, step), key=abs)
+    for angle in angles:
+        profile = np.asarray(
+            text_mask.rotate(angle, resample=Image.Resampling.NEAREST)
+        ).sum(axis=1, dtype=float)
+        score = profile.var()
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+
+    return best_angle
+
+
+def preprocess_image(img: Image.Image, options: dict) -> Image.Image:
+    """Prepare an image for OCR.
+
+    Steps (each one enabled by `options`) are: downscale, grayscale
+    conversion, deskew, binarization and crop to the text region.
+    Tesseract is much faster on images with the resolution it needs
+    (phone photos are often far larger).
+
+    Args:
+        img (Image.Image): input image.
+        options (dict): preprocessing options (see `panel.menu_ocr.preprocessing`).
+
+    Returns:
+        Image.Image: processed image.
+    """
+    if not options["enabled"]:
+        return img
+
+    # Transparent background to white (before downscale and grayscale)
+    img = _flatten_alpha(img)
+    # Downscale (JPEG images are reduced while decoding, which is faster)
+    max_size = options["max_size"]
+    if max_size and max(img.size) > max_size:
+        if options["grayscale"]:
+            img.draft("L", (max_size, max_size))
+        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    # Grayscale
+    if options["grayscale"] or options["binarize"] or options["deskew"]:
+        img = img.convert("L")
+    # Deskew
+    if options["deskew"]:
+        angle = _estimate_skew(
+            img, options["deskew_max_angle"], options["deskew_step"]
+        )
+        if angle:
+            img = img.rotate(
+                angle,
+                resample=Image.Resampling.BICUBIC,
+                expand=True,
+                fillcolor=255,
+            )
+    # Binarize (Otsu's threshold)
+    if options["binarize"]:
+        pixels = np.asarray(img)
+        img = Image.fromarray(
+            ((pixels >= _otsu_threshold(pixels)) * 255).astype(np.uint8)
+        )
+    # Crop to the text region (dark pixels) plus a margin
+    if options["crop"] and img.mode == "L":
+        pixels = np.asarray(img)
+        text_mask = pixels < _otsu_threshold(pixels)
+        rows = np.flatnonzero(text_mask.any(axis=1))
+        cols = np.flatnonzero(text_mask.any(axis=0))
+        if rows.size and cols.size:
+            margin = options["crop_margin"]
+            img = img.crop(
+                (
+                    max(cols[0] - margin, 0),
+                    max(rows[0] - margin, 0),
+                    min(cols[-1] + margin + 1, img.width),
+                    min(rows[-1] + margin + 1, img.height),
+                )
+            )
+
+    return img
+
+
+def _find_gutters(
+    profile: np.ndarray, count: int, search_ratio: float
+) -> list[int]:
+    """Find split positions between text blocks.
+
+    Each split position is the center of the positions with the fewest text
+    pixels, searched around equally spaced positions.
+
+    Args:
+        profile (np.ndarray): number of text pixels for each position.
+        count (int): number of blocks.
+        search_ratio (float): size of the search window around each equally
+            spaced position (as a fraction of the profile size).
+
+    Returns:
+        list[int]: split positions (`count - 1` values).
+    """
+    size = len(profile)
+    window = int(size * search_ratio)
+    splits = []
+    for k in range(1, count):
+        nominal = size * k // count
+        start = max(nominal - window, 1)
+        stop = min(nominal + window + 1, size - 1)
+        if start >= stop:
+            splits.append(nominal)
+            continue
+        search = profile[start:stop]
+        splits.append(
+            start + int(np.median(np.flatnonzero(search == search.min())))
+        )
+
+    return splits
+
+
+def split_image(img: Image.Image, options: dict) -> list[Image.Image]:
+    """Split an image into tiles, in reading order.
+
+    Tiles are columns (for multi-column menus, read left to right) or
+    horizontal bands (read top to bottom). Split positions are placed where
+    there is no text (or the least text), so that rows are not cut.
+
+    Args:
+        img (Image.Image): input image.
+        options (dict): tiling options (see `panel.menu_ocr.tiling`).
+
+    Returns:
+        list[Image.Image]: tiles (only the input image if tiling is disabled).
+    """
+    mode = options["mode"]
+    count = options["count"]
+    if not mode or count < 2:
+        return [img]
+    if mode not in ("columns", "bands"):
+        raise ValueError(f"unknown tiling mode '{mode}'")
+
+    pixels = np.asarray(_flatten_alpha(img).convert("L"))
+    text_mask = pixels < _otsu_threshold(pixels)
+    # Text pixels for each column (x positions) or row (y positions)
+    profile = text_mask.sum(axis=0 if mode == "columns" else 1)
+    edges = [
+        0,
+        *_find_gutters(profile, count, options["search_ratio"]),
+        len(profile),
+    ]
+    if mode == "columns":
+        boxes = [(a, 0, b, img.height) for a, b in zip(edges, edges[1:])]
+    else:
+        boxes = [(0, a, img.width, b) for a, b in zip(edges, edges[1:])]
+
+    return [
+        img.crop(box) for box in boxes if box[2] > box[0] and box[3] > box[1]
+    ]
+
+
+def _run_tesseract(img: Image.Image, options: dict) -> str:
+    """Extract text from an image with tesseract.
+
+    Args:
+        img (Image.Image): image (already preprocessed).
+        options (dict): OCR options (see `get_ocr_options`).
+
+    Raises:
+        RuntimeError: OCR error (pytesseract exceptions cannot be sent back
+            to the main process, since they cannot be pickled).
+
+    Returns:
+        str: extracted text.
+    """
+    try:
+        return pytesseract.image_to_string(
+            img, lang=options["lang"], config=options["tesseract_config"]
+        )
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def image_to_text(image_path: str, options: dict) -> str:
+    """Preprocess an image and extract its text with tesseract.
+
+    This function runs inside worker processes.
+
+    Args:
+        image_path (str): path of the image file.
+        options (dict): OCR options (see `get_ocr_options`).
+
+    Raises:
+        RuntimeError: OCR error.
+
+    Returns:
+        str: extracted text.
+    """
+    with Image.open(image_path) as img:
+        return _run_tesseract(
+            preprocess_image(img, options["preprocessing"]), options
+        )
+
+
+def image_to_tiles(image_path: str, options: dict) -> list[Image.Image]:
+    """Preprocess an image and split it into tiles.
+
+    This function runs inside worker processes.
+
+    Args:
+        image_path (str): path of the image file.
+        options (dict): OCR options (see `get_ocr_options`).
+
+    Returns:
+        list[Image.Image]: tiles, in reading order.
+    """
+    with Image.open(image_path) as img:
+        img = preprocess_image(img, options["preprocessing"])
+        # Load pixels, so that tiles can be sent back after closing the file
+        img.load()
+        return split_image(img, options["tiling"])
+
+
+def tile_to_text(tile: Image.Image, options: dict) -> str:
+    """Extract text from a tile with tesseract.
+
+    This function runs inside worker processes.
+
+    Args:
+        tile (Image.Image): tile (already preprocessed).
+        options (dict): OCR options (see `get_ocr_options`).
+
+    Raises:
+        RuntimeError: OCR error.
+
+    Returns:
+        str: extracted text.
+    """
+    return _run_tesseract(tile, options)
+
+
+def is_pdf_supported() -> bool:
+    """Check if the optional dependency `pypdfium2` (used for PDF files) is
+    installed.
+
+    Returns:
+        bool: `True` if `pypdfium2` can be imported.
+    """
+    try:
+        import pypdfium2  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def _import_pypdfium2() -> Any:
+    """Import `pypdfium2` with a meaningful error if it is missing.
+
+    Raises:
+        ImportError: missing library (pypdfium2).
+
+    Returns:
+        Any: `pypdfium2` module.
+    """
+    try:
+        import pypdfium2
+    except ImportError as e:
+        raise ImportError(
+            "pypdfium2 is required for PDF files, install it with 'pip install dlunch[pdf]'"
+        ) from e
+
+    return pypdfium2
+
+
+def pdf_to_texts(pdf_path: str, min_text_chars: int) -> list[str | None]:
+    """Read the text layer of each page of a PDF file.
+
+    This function runs inside worker processes.
+
+    Args:
+        pdf_path (str): path of the PDF file.
+        min_text_chars (int): pages with fewer characters (whitespaces
+            excluded) are considered without text.
+
+    Returns:
+        list[str | None]: text of each page (`None` for pages without text,
+            that require OCR).
+    """
+    pdfium = _import_pypdfium2()
+    texts = []
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for page in pdf:
+            text = page.get_textpage().get_text_range()
+            text = "\n".join(row.strip() for row in text.splitlines())
+            if len("".join(text.split())) < min_text_chars:
+                text = None
+            texts.append(text)
+            page.close()
+    finally:
+        pdf.close()
+
+    return texts
+
+
+def pdf_page_to_text(pdf_path: str, page_index: int, options: dict) -> str:
+    """Render a page of a PDF file, preprocess it and extract its text with
+    tesseract.
+
+    This function runs inside worker processes (one page at a time).
+
+    Args:
+        pdf_path (str): path of the PDF file.
+        page_index (int): page index (starting from 0).
+        options (dict): OCR options (see `get_ocr_options`).
+
+    Raises:
+        RuntimeError: OCR error.
+
+    Returns:
+        str: extracted text.
+    """
+    pdfium = _import_pypdfium2()
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        page = pdf[page_index]
+        img = page.render(scale=options["pdf"]["dpi"] / 72).to_pil()
+        page.close()
+    finally:
+        pdf.close()
+
+    return _run_tesseract(
+        preprocess_image(img, options["preprocessing"]), options
+    )
+
+
+def text_to_rows(text: str) -> list[str]:
+    """Split text into menu items.
+
+    Empty rows and rows that are completely uppercase (section titles) are
+    dropped.
+
+    Args:
+        text (str): text extracted from the menu.
+
+    Returns:
+        list[str]: menu items.
+    """
+    return [row for row in text.split("\n") if row and not row.isupper()]
+
+
+async def read_menu_file(
+    config: DictConfig,
+    file_path: str | pathlib.Path,
+    progress: Callable[[int, int], None] | None = None,
+) -> list[str]:
+    """Extract menu items from an image or a PDF file without blocking the
+    event loop.
+
+    Rows are read from the OCR cache if the same file was already processed
+    with the same options.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+        file_path (str | pathlib.Path): path of the image or PDF file.
+        progress (Callable[[int, int], None] | None, optional): function
+            called with the number of processed tiles (or pages) and their
+            total number. Defaults to None.
+
+    Raises:
+        ValueError: unknown file extension.
+
+    Returns:
+        list[str]: menu items.
+    """
+    file_path = pathlib.Path(file_path)
+    file_ext = file_path.suffix.lower()
+    if file_ext not in IMAGE_EXTENSIONS + PDF_EXTENSIONS:
+        raise ValueError(f"unknown menu file extension '{file_ext}'")
+    options = get_ocr_options(config)
+
+    # Check cache
+    cache = get_cache(config)
+    if cache is not None:
+        key = cache.build_key(file_path, options)
+        rows = cache.get(key)
+        if rows is not None:
+            log.info(f"text of {file_path.name} read from OCR cache")
+            return rows
+
+    executor = get_executor(config)
+    try:
+        if file_ext in PDF_EXTENSIONS:
+            texts = await _read_pdf_texts(
+                executor, str(file_path), options, progress
+            )
+        else:
+            texts = await _read_image_texts(
+                executor, str(file_path), options, progress
+            )
+    except BrokenProcessPool:
+        _drop_executor(executor)
+        raise
+
+    # Merge rows in reading order
+    rows = [row for text in texts for row in text_to_rows(text)]
+    if cache is not None:
+        cache.set(key, rows)
+
+    return rows
+
+
+async def _read_image_texts(
+    executor: ProcessPoolExecutor,
+    image_path: str,
+    options: dict,
+    progress: Callable[[int, int], None] | None = None,
+) -> list[str]:
+    """Extract text from an image with the process pool.
+
+    If tiling is enabled (see `panel.menu_ocr.tiling`) tiles are processed
+    concurrently.
+
+    Args:
+        executor (ProcessPoolExecutor): process pool.
+        image_path (str): path of the image file.
+        options (dict): OCR options (see `get_ocr_options`).
+        progress (Callable[[int, int], None] | None, optional): function
+            called with the number of processed tiles and the number of
+            tiles. Defaults to None.
+
+    Returns:
+        list[str]: texts, in reading order.
+    """
+    image_name = pathlib.Path(image_path).name
+    loop = asyncio.get_running_loop()
+    if not options["tiling"]["mode"]:
+        text = await loop.run_in_executor(
+            executor, image_to_text, image_path, options
+        )
+        log.info(f"text extracted from image {image_name}")
+        return [text]
+
+    tiles = await loop.run_in_executor(
+        executor, image_to_tiles, image_path, options
+    )
+    texts = await _gather_with_progress(
+        [
+            loop.run_in_executor(executor, tile_to_text, tile, options)
+            for tile in tiles
+        ],
+        progress=progress,
+    )
+    log.info(f"text extracted from image {image_name} ({len(tiles)} tiles)")
+
+    return texts
+
+
+async def _read_pdf_texts(
+    executor: ProcessPoolExecutor,
+    pdf_path: str,
+    options: dict,
+    progress: Callable[[int, int], None] | None = None,
+) -> list[str]:
+    """Extract text from a PDF file with the process pool.
+
+    The text layer is used when present, the other pages are rendered and
+    processed with OCR concurrently (one page for each task).
+
+    Args:
+        executor (ProcessPoolExecutor): process pool.
+        pdf_path (str): path of the PDF file.
+        options (dict): OCR options (see `get_ocr_options`).
+        progress (Callable[[int, int], None] | None, optional): function
+            called with the number of processed pages and the number of
+            pages that require OCR. Defaults to None.
+
+    Returns:
+        list[str]: text of each page.
+    """
+    pdf_name = pathlib.Path(pdf_path).name
+    loop = asyncio.get_running_loop()
+    texts = await loop.run_in_executor(
+        executor, pdf_to_texts, pdf_path, options["pdf"]["min_text_chars"]
+    )
+    ocr_pages = [n for n, text in enumerate(texts) if text is None]
+    if ocr_pages:
+        ocr_texts = await _gather_with_progress(
+            [
+                loop.run_in_executor(
+                    executor, pdf_page_to_text, pdf_path, n, options
+                )
+                for n in ocr_pages
+            ],
+            progress=progress,
+        )
+        for n, text in zip(ocr_pages, ocr_texts):
+            texts[n] = text
+    log.info(
+        f"text extracted from {pdf_name} ({len(texts)} pages, {len(ocr_pages)} with OCR)"
+    )
+
+    return texts
+
+
+async def _gather_with_progress(
+    futures: list[asyncio.Future],
+    progress: Callable[[int, int], None] | None = None,
+) -> list:
+    """Wait for futures and report progress every time one of them is done.
+
+    Args:
+        futures (list[asyncio.Future]): futures to wait for.
+        progress (Callable[[int, int], None] | None, optional): function
+            called with the number of completed futures and the number of
+            futures. Defaults to None.
+
+    Returns:
+        list: results, in the same order of futures.
+    """
+    if progress is not None:
+        progress(0, len(futures))
+        for done, future in enumerate(asyncio.as_completed(futures), 1):
+            # Wait for completion (results are collected below, in order)
+            try:
+                await future
+            except Exception:
+                # Errors are raised by gather
+                break
+            progress(done, len(futures))
+
+    return await asyncio.gather(*futures)
@@ -1,45 +1,201 @@
 """Module with functions used to execute scheduled tasks.
 
 See https://panel.holoviz.org/how_to/callbacks/schedule.html for details.
+
+Task actions are blocking (database and cloud storage operations), so they
+are executed in a thread or process pool and do not block the sessions
+served by the event loop.
 """
 
+import asyncio
 import logging
 import datetime as dt
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import zlib
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from omegaconf import DictConfig
 import panel as pn
+from panel.util import parse_timedelta
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
 
 from . import auth
 from . import cloud
 from . import core
+from . import models
+from . import state
 
 # LOGGER ----------------------------------------------------------------------
 log: logging.Logger = logging.getLogger(__name__)
 """Module logger."""
 
 
+# EXECUTORS -------------------------------------------------------------------
+EXECUTOR_TYPES: tuple[str, ...] = ("thread", "process")
+"""Executors available for task actions."""
+
+_EXECUTORS: dict[tuple[int, str], Executor] = {}
+"""Executors used for task actions (keys are PIDs and executor types, so that
+forked processes do not share the same pool)."""
+_executors_lock: threading.Lock = threading.Lock()
+"""Lock used to create a single executor for each type."""
+
+
+def get_executor(config: DictConfig, executor_type: str) -> Executor:
+    """Return the executor used to run task actions.
+
+    The executor is created at first use and shared by all tasks of the
+    current process.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+        executor_type (str): `thread` or `process`.
+
+    Raises:
+        ValueError: unknown executor type.
+
+    Returns:
+        Executor: thread or process pool.
+    """
+    key = (os.getpid(), executor_type)
+    with _executors_lock:
+        executor = _EXECUTORS.get(key)
+        if executor is None:
+            executor_config = config.panel.scheduled_tasks_executor
+            if executor_type == "thread":
+                executor = ThreadPoolExecutor(
+                    max_workers=executor_config.max_workers,
+                    thread_name_prefix="data_lunch_task",
+                )
+            elif executor_type == "process":
+                executor = ProcessPoolExecutor(
+                    max_workers=executor_config.max_workers,
+                    mp_context=multiprocessing.get_context(
+                        executor_config.start_method
+                    ),
+                )
+            else:
+                raise ValueError(
+                    f"unknown executor type '{executor_type}' (valid types are {', '.join(EXECUTOR_TYPES)})"
+                )
+            _EXECUTORS[key] = executor
+            log.info(
+                f"scheduled tasks {executor_type} pool started ({executor_config.max_workers} workers)"
+            )
+
+    return executor
+
+
 # CLASSES ---------------------------------------------------------------------
 class TaskAction:
     """Generic task action object.
 
     Its scope is to build a callable that will be executed when the task is
     triggered.
+
+    The blocking part of the action is the `run` method (override it in
+    subclasses): the scheduled callable executes it in a thread or process
+    pool, with an optional timeout. A new execution is skipped if the
+    previous one is still running.
+
+    Changes notified by `run` (see `state.notify_change`) do not reach the
+    server process if the action runs in a process pool: list their topics
+    in `changed_topics`, so that they are notified by the server process once
+    the action ends.
+
+    Args:
+        executor (str, optional): executor type, `thread` or `process`.
+            Actions executed in a process pool do not update the caches of the
+            server process (e.g. `auth.guest_password_cache`).
+            Defaults to `thread`.
+        timeout (float | None, optional): seconds to wait for the action
+            before logging an error (the running action is not interrupted).
+            If `None` wait until the action ends. Defaults to None.
     """
 
-    def build_callable(self, config: DictConfig) -> callable:
-        """Build and return the scheduled callable that executes a dummy
-        task action.
+    changed_topics: tuple[str, ...] = ()
+    """Topics of the changes notified by `run` (notified again by the server
+    process if the action runs in a process pool)."""
+
+    def __init__(
+        self, executor: str = "thread", timeout: float | None = None
+    ) -> None:
+        if executor not in EXECUTOR_TYPES:
+            raise ValueError(
+                f"unknown executor type '{executor}' (valid types are {', '.join(EXECUTOR_TYPES)})"
+            )
+        self.executor: str = executor
+        """Executor type (`thread` or `process`)."""
+        self.timeout: float | None = timeout
+        """Seconds to wait for the action (`None` means no timeout)."""
+
+    def run(self, config: DictConfig) -> None:
+        """Execute a dummy task action (blocking).
 
         It just logs a message.
 
         Args:
             config (DictConfig): Hydra configuration dictionary.
         """
+        log.info(f"dummy task executed for {config.panel.gui.title.lower()}")
 
-        async def action_callable() -> None:
-            """Scheduled callable that executes a dummy task action."""
-            log.info(
-                f"dummy task executed for {config.panel.gui.title.lower()}"
+    def build_callable(self, config: DictConfig) -> callable:
+        """Build and return the scheduled callable that executes the task
+        action (see `run`) in the selected executor.
+
+        The scheduled callable returns the future of the running execution
+        (the previous one if the new execution was skipped), that may still
+        be running after a timeout.
+
+        Args:
+            config (DictConfig): Hydra configuration dictionary.
+        """
+        action_name = type(self).__name__
+        # Last execution (used to avoid overlapping runs)
+        running: dict[str, Future | None] = {"future": None}
+
+        def notify_changes(future: Future) -> None:
+            """Notify changes made by the action in a worker process (the
+            worker process has no notifier and no live sessions)."""
+            for topic in self.changed_topics:
+                state.notify_change(topic=topic)
+
+        async def action_callable() -> Future:
+            """Scheduled callable that executes the task action."""
+            future = running["future"]
+            if future is not None and not future.done():
+                log.warning(
+                    f"{action_name} skipped: the previous execution is still running"
+                )
+                return future
+            future = get_executor(config, self.executor).submit(
+                self.run, config
             )
+            running["future"] = future
+            if self.executor == "process" and self.changed_topics:
+                future.add_done_callback(notify_changes)
+            try:
+                # Shield the future, so that a timeout does not hide that the
+                # action is still running
+                await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(future)),
+                    timeout=self.timeout,
+                )
+            except TimeoutError:
+                log.error(
+                    f"{action_name} timed out after {self.timeout} s (it keeps running in background)"
+                )
+
+            return future
 
         return action_callable
 
@@ -51,26 +207,19 @@ class CleanFilesDB(TaskAction):
     triggered.
     """
 
-    def build_callable(self, config: DictConfig) -> callable:
-        """Build and return the scheduled callable that cleans temporary
-        tables and files.
+    changed_topics: tuple[str, ...] = ("menu",)
+    """Topics of the changes notified by `run` (tables are cleaned)."""
+
+    def run(self, config: DictConfig) -> None:
+        """Clean temporary tables and files (blocking).
 
         Args:
             config (DictConfig): Hydra configuration dictionary.
         """
-
-        # Set waiter
+        log.info(f"clean task (files and db) executed at {dt.datetime.now()}")
         waiter = core.Waiter(config=config)
-
-        async def action_callable() -> None:
-            """Scheduled callable that cleans temporary tables and files."""
-            log.info(
-                f"clean task (files and db) executed at {dt.datetime.now()}"
-            )
-            waiter.delete_files()
-            waiter.clean_tables()
-
-        return action_callable
+        waiter.delete_files()
+        waiter.clean_tables()
 
 
 class ResetGuestPassword(TaskAction):
@@ -80,28 +229,20 @@ class ResetGuestPassword(TaskAction):
     triggered.
     """
 
-    def build_callable(self, config: DictConfig) -> callable:
-        """Build and return the scheduled callable that resets the guest
-        user password.
+    def run(self, config: DictConfig) -> None:
+        """Reset the guest user password (blocking).
 
         Args:
             config (DictConfig): Hydra configuration dictionary.
         """
-
-        # Set auth configurations
+        log.info(f"reset guest user password executed at {dt.datetime.now()}")
         auth_context = auth.AuthContext(config=config)
-
-        async def action_callable() -> None:
-            """Scheduled callable that resets the guest user password."""
-            log.info(
-                f"reset guest user password executed at {dt.datetime.now()}"
-            )
-            auth_context.database_connector.set_flag(
-                id="reset_guest_user_password", value=True
-            )
-            auth_context.set_guest_user_password()
-
-        return action_callable
+        auth_context.database_connector.set_flag(
+            id="reset_guest_user_password", value=True
+        )
+        # Drop the cached password, so that the flag is checked
+        auth.guest_password_cache.invalidate()
+        auth_context.set_guest_user_password()
 
 
 class UploadDBToGCP(TaskAction):
@@ -111,28 +252,238 @@ class UploadDBToGCP(TaskAction):
     triggered.
 
     Args:
+        executor (str, optional): executor type, `thread` or `process`.
+            Defaults to `thread`.
+        timeout (float | None, optional): seconds to wait for the action
+            before logging an error. Defaults to None.
         kwargs (dict): Keyword arguments for the cloud.upload_to_gcloud function.
     """
 
-    def __init__(self, **kwargs) -> None:
+    def __init__(
+        self,
+        executor: str = "thread",
+        timeout: float | None = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(executor=executor, timeout=timeout)
         self.gcp_kwargs = kwargs
 
-    def build_callable(self, config: DictConfig) -> callable:
-        """Build and return the scheduled callable that uploads the database to
-        Google Cloud Storage.
+    def run(self, config: DictConfig) -> None:
+        """Upload the database to Google Cloud Storage (blocking).
 
         Args:
             config (DictConfig): Hydra configuration dictionary.
         """
+        log.info(
+            f"upload database to gcp storage executed at {dt.datetime.now()}"
+        )
+        cloud.upload_to_gcloud(**self.gcp_kwargs)
 
-        async def action_callable() -> None:
-            """Scheduled callable that uploads the database to Google Cloud Storage."""
-            log.info(
-                f"upload database to gcp storage executed at {dt.datetime.now()}"
+
+class TaskLock:
+    """Lock used to execute each scheduled run of a task only once across
+    processes (and replicas) sharing the same database.
+
+    Every process schedules the same tasks: the first process that triggers
+    a run acquires the lock (a row of `task_locks` table) and the others skip
+    it. A run can be acquired only if the previous one is at least a period
+    old (less a small tolerance for timers of different processes) and it was
+    released, or it is stale (not released nor renewed for a whole period,
+    e.g. because its process died). The lock holder is stored in the table.
+
+    On PostgreSQL concurrent acquisitions are also serialized by an advisory
+    lock, so that losing processes return immediately.
+
+    Args:
+        config (DictConfig): Hydra configuration dictionary.
+        name (str): task name.
+        period (str | dt.timedelta): the period between executions.
+        period_tolerance (float, optional): fraction of the period that may
+            separate the triggers of the same run in different processes.
+            Defaults to 0.1.
+    """
+
+    def __init__(
+        self,
+        config: DictConfig,
+        name: str,
+        period: str | dt.timedelta,
+        period_tolerance: float = 0.1,
+    ) -> None:
+        self.name: str = name[:100]
+        """Task name (lock ID)."""
+        if isinstance(period, str):
+            period = parse_timedelta(period)
+        self.period: float = period.total_seconds()
+        """Period between executions (seconds)."""
+        self.period_tolerance: float = period_tolerance
+        """Fraction of the period used as tolerance for timers."""
+        self.holder: str = f"{socket.gethostname()}:{os.getpid()}"[:200]
+        """Lock holder stored in the table (hostname and PID)."""
+        self.database_connector: models.DatabaseConnector = (
+            models.DatabaseConnector(config=config)
+        )
+        """Object that handles database connection and operations"""
+        self._acquired_at: float | None = None
+        """Time of the last acquisition made by this process."""
+
+    @property
+    def advisory_lock_key(self) -> int:
+        """Key of the PostgreSQL advisory lock (derived from task name)."""
+        return zlib.crc32(f"data_lunch_task:{self.name}".encode("utf-8"))
+
+    def _create_row(self) -> None:
+        """Add the lock row if missing (it is immediately available)."""
+        with self.database_connector.session_scope() as session:
+            if session.get(models.TaskLocks, self.name) is not None:
+                return
+            session.add(
+                models.TaskLocks(
+                    id=self.name,
+                    holder=None,
+                    acquired_at=0,
+                    released_at=0,
+                    expires_at=0,
+                    next_run_at=0,
+                )
             )
-            cloud.upload_to_gcloud(**self.gcp_kwargs)
+            try:
+                session.commit()
+            except IntegrityError:
+                # Row added by another process
+                session.rollback()
 
-        return action_callable
+    def acquire(self) -> bool:
+        """Try to acquire the lock for the current run (non blocking).
+
+        Returns:
+            bool: `True` if this process shall execute the run.
+        """
+        self._create_row()
+        now = time.time()
+        with self.database_connector.session_scope() as session:
+            if (
+                models.DatabaseConnector.get_db_dialect(session)
+                == "postgresql"
+            ):
+                # Released at the end of the transaction
+                if not session.scalar(
+                    select(
+                        func.pg_try_advisory_xact_lock(self.advisory_lock_key)
+                    )
+                ):
+                    return False
+            # Compare-and-set update (atomic also on SQLite)
+            result = session.execute(
+                update(models.TaskLocks)
+                .where(
+                    models.TaskLocks.id == self.name,
+                    models.TaskLocks.next_run_at <= now,
+                    or_(
+                        models.TaskLocks.released_at.is_not(None),
+                        models.TaskLocks.expires_at <= now,
+                    ),
+                )
+                .values(
+                    holder=self.holder,
+                    acquired_at=now,
+                    released_at=None,
+                    expires_at=now + self.period,
+                    next_run_at=now
+                    + self.period * (1 - self.period_tolerance),
+                )
+            )
+            session.commit()
+        acquired = result.rowcount == 1
+        if acquired:
+            self._acquired_at = now
+            log.info(f"task '{self.name}' lock acquired by {self.holder}")
+
+        return acquired
+
+    def renew(self) -> None:
+        """Extend the expiration of the lock acquired by this process by a
+        period (so that a run longer than a period is not considered stale).
+        """
+        if self._acquired_at is None:
+            return
+        with self.database_connector.session_scope() as session:
+            session.execute(
+                update(models.TaskLocks)
+                .where(
+                    models.TaskLocks.id == self.name,
+                    models.TaskLocks.holder == self.holder,
+                    models.TaskLocks.acquired_at == self._acquired_at,
+                    models.TaskLocks.released_at.is_(None),
+                )
+                .values(expires_at=time.time() + self.period)
+            )
+            session.commit()
+        log.debug(f"task '{self.name}' lock renewed by {self.holder}")
+
+    def release(self) -> None:
+        """Release the lock acquired by this process."""
+        if self._acquired_at is None:
+            return
+        with self.database_connector.session_scope() as session:
+            session.execute(
+                update(models.TaskLocks)
+                .where(
+                    models.TaskLocks.id == self.name,
+                    models.TaskLocks.holder == self.holder,
+                    models.TaskLocks.acquired_at == self._acquired_at,
+                )
+                .values(released_at=time.time())
+            )
+            session.commit()
+        self._acquired_at = None
+        log.debug(f"task '{self.name}' lock released by {self.holder}")
+
+    def release_when_done(self, futures: list[Future]) -> None:
+        """Release the lock once all the given executions end (non blocking).
+
+        Until then the lock is renewed every half period. Renewal and release
+        errors are logged.
+
+        Args:
+            futures (list[Future]): executions of the run that holds the lock.
+        """
+        pending = {"count": len(futures)}
+        pending_lock = threading.Lock()
+        done = threading.Event()
+
+        def call_logging_errors(method: callable) -> None:
+            try:
+                method()
+            except Exception as e:
+                log.warning(
+                    f"task '{self.name}' lock error ({method.__name__}): {e}"
+                )
+
+        def renew() -> None:
+            if done.is_set():
+                return
+            call_logging_errors(self.renew)
+            timer = threading.Timer(self.period / 2, renew)
+            timer.daemon = True
+            timer.start()
+
+        def on_done(future: Future) -> None:
+            with pending_lock:
+                pending["count"] -= 1
+                last = pending["count"] == 0
+            if last:
+                done.set()
+                # Release in a new thread (callbacks may run in the executor)
+                threading.Thread(
+                    target=call_logging_errors,
+                    args=(self.release,),
+                    daemon=True,
+                ).start()
+
+        renew()
+        for future in futures:
+            future.add_done_callback(on_done)
 
 
 class Task:
@@ -152,6 +503,9 @@ class Task:
             * Minute: `'1m'`
             * Second: `'1s'`
         actions (list[TaskAction]): List of actions to be executed.
+        single_runner (bool, optional): if `True` each run is executed by a
+            single process among those sharing the database (see `TaskLock`).
+            Defaults to False.
     """
 
     def __init__(
@@ -162,6 +516,7 @@ class Task:
         minute: int | None,
         period: str,
         actions: list[TaskAction],
+        single_runner: bool = False,
     ) -> None:
         self.name: str = name
         """Task name (used for logs)."""
@@ -183,6 +538,8 @@ class Task:
         """
         self.actions: list[TaskAction] = actions
         """List of actions to be executed."""
+        self.single_runner: bool = single_runner
+        """Flag that marks a task to be executed by a single process."""
 
     def build_callable(self, config: DictConfig) -> callable:
         """Build and return a callable that executes all actions
@@ -195,10 +552,64 @@ class Task:
         task_callables = [
             action.build_callable(config=config) for action in self.actions
         ]
+        task_lock = (
+            TaskLock(
+                config=config,
+                name=self.name,
+                period=self.period,
+                period_tolerance=config.panel.scheduled_tasks_lock.period_tolerance,
+            )
+            if self.single_runner
+            else None
+        )
+        # Executions of the run that holds the lock
+        locked_run: dict[str, list[Future]] = {"futures": []}
 
         async def task_callable() -> None:
-            for callable in task_callables:
-                await callable()
+            if task_lock is None:
+                for callable in task_callables:
+                    await callable()
+                return
+
+            # The lock is held until the previous run ends
+            if not all(f.done() for f in locked_run["futures"]):
+                log.warning(
+                    f"task '{self.name}' skipped: the previous run is still running"
+                )
+                return
+            # Lock queries are blocking: run them in the tasks thread pool
+            loop = asyncio.get_running_loop()
+            executor = get_executor(config, "thread")
+            try:
+                acquired = await loop.run_in_executor(
+                    executor, task_lock.acquire
+                )
+            except Exception as e:
+                log.warning(
+                    f"task '{self.name}' skipped: unable to acquire lock: {e}"
+                )
+                return
+            if not acquired:
+                log.info(
+                    f"task '{self.name}' skipped: run already executed by another process"
+                )
+                return
+            futures = []
+            locked_run["futures"] = futures
+            try:
+                for callable in task_callables:
+                    futures.append(await callable())
+            finally:
+                running = [f for f in futures if not f.done()]
+                if running:
+                    # Do not release the lock while actions are running,
+                    # otherwise another process may start an overlapping run
+                    log.info(
+                        f"task '{self.name}' lock held until its actions end"
+                    )
+                    task_lock.release_when_done(running)
+                else:
+                    await loop.run_in_executor(executor, task_lock.release)
 
         return task_callable
 
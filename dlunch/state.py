@@ -0,0 +1,409 @@
+"""Module with the process-wide state shared by all Data-Lunch sessions.
+
+The lunch data (menu, orders, guests, stats and birthdays) is the same for
+every connected user, so it is computed once per process and stored in a
+versioned snapshot. The version is bumped every time the underlying tables
+are changed, and sessions rebuild their widgets from the snapshot without
+querying the database unless the version changed.
+
+Changes are also published on a change feed, so that live sessions are
+updated without waiting for users to press the refresh button.
+"""
+
+import datetime as dt
+import itertools
+import logging
+import pandas as pd
+import panel as pn
+import threading
+
+from bokeh.document import Document
+from functools import partial
+from panel.io.state import set_curdoc
+from typing import Any, Callable, TYPE_CHECKING
+
+# Type checking imports (avoid loading database modules at import time)
+if TYPE_CHECKING:
+    from .notifiers import Notifier
+
+# LOGGER ----------------------------------------------------------------------
+log: logging.Logger = logging.getLogger(__name__)
+"""Module logger."""
+
+
+# CLASSES ---------------------------------------------------------------------
+class LunchSnapshot:
+    """Immutable collection of the lunch data shared by all sessions.
+
+    Dataframes stored here are shared: copy them before changing them.
+
+    Files derived from the snapshot (e.g. the Excel file with orders) are
+    built once with `get_artifact` and dropped together with the snapshot.
+
+    Args:
+        version (int): version of the lunch state used to build the snapshot.
+        date (dt.date): day the snapshot refers to.
+        menu (pd.DataFrame): menu table (indexed by menu item ID).
+        orders (dict): dictionary with dataframes summarizing the orders for
+            each lunch-time/takeaway-time (see `Waiter.df_list_by_lunch_time`).
+        guests_lists (dict): lists of users divided by guest type.
+        stats (pd.DataFrame): stats grouped by month and guest type.
+        stats_pivot (pd.DataFrame): stats table pivoted on guest type.
+        birthdays (pd.DataFrame): upcoming birthdays.
+        no_more_orders (bool): value of the "no more orders" flag.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        date: dt.date,
+        menu: pd.DataFrame,
+        orders: dict,
+        guests_lists: dict,
+        stats: pd.DataFrame,
+        stats_pivot: pd.DataFrame,
+        birthdays: pd.DataFrame,
+        no_more_orders: bool,
+    ) -> None:
+        self.version: int = version
+        """Version of the lunch state used to build the snapshot."""
+        self.date: dt.date = date
+        """Day the snapshot refers to."""
+        self.menu: pd.DataFrame = menu
+        """Menu table (indexed by menu item ID)."""
+        self.orders: dict = orders
+        """Dataframes summarizing the orders for each lunch-time/takeaway-time."""
+        self.guests_lists: dict = guests_lists
+        """Lists of users divided by guest type."""
+        self.stats: pd.DataFrame = stats
+        """Stats grouped by month and guest type."""
+        self.stats_pivot: pd.DataFrame = stats_pivot
+        """Stats table pivoted on guest type."""
+        self.birthdays: pd.DataFrame = birthdays
+        """Upcoming birthdays."""
+        self.no_more_orders: bool = no_more_orders
+        """Value of the "no more orders" flag."""
+        self._artifacts: dict[str, Any] = {}
+        """Objects derived from the snapshot (keys are artifact names)."""
+        self._artifacts_lock: threading.Lock = threading.Lock()
+        """Lock used to build each artifact only once."""
+
+    def get_artifact(
+        self, name: str, builder: Callable[["LunchSnapshot"], Any]
+    ) -> Any:
+        """Return an object derived from the snapshot, build it if missing.
+
+        Artifacts are shared by all sessions: sessions that ask for an
+        artifact while it is being built wait for the result.
+        Return immutable objects (e.g. `bytes`), since they are shared.
+
+        Args:
+            name (str): artifact name (used as cache key).
+            builder (Callable[[LunchSnapshot], Any]): function that takes the
+                snapshot and returns the artifact.
+
+        Returns:
+            Any: cached artifact.
+        """
+        with self._artifacts_lock:
+            if name not in self._artifacts:
+                self._artifacts[name] = builder(self)
+                log.debug(f"artifact '{name}' built for {self}")
+
+            return self._artifacts[name]
+
+    def __repr__(self) -> str:
+        """Simple object representation.
+
+        Returns:
+            str: string representation.
+        """
+        return f"<LUNCH_SNAPSHOT:v{self.version} - {self.date}>"
+
+
+class LunchState:
+    """Versioned cache of the lunch snapshot.
+
+    The version is a monotonically increasing integer, bumped by every
+    function that changes menu, orders or users. The snapshot is rebuilt
+    only if its version (or its day) is outdated.
+    """
+
+    def __init__(self) -> None:
+        self._lock: threading.RLock = threading.RLock()
+        """Lock used to serialize version updates and snapshot rebuilds."""
+        self._version: int = 0
+        """Current version of the lunch state."""
+        self._snapshot: LunchSnapshot | None = None
+        """Last snapshot built."""
+
+    @property
+    def version(self) -> int:
+        """Current version of the lunch state."""
+        return self._version
+
+    def bump_version(self) -> int:
+        """Increase the version of the lunch state, so that the next request
+        rebuilds the snapshot.
+
+        Returns:
+            int: new version.
+        """
+        with self._lock:
+            self._version += 1
+            version = self._version
+        log.debug(f"lunch state version bumped to {version}")
+
+        return version
+
+    def get_snapshot(
+        self, builder: Callable[[int], LunchSnapshot]
+    ) -> LunchSnapshot:
+        """Return the cached snapshot, rebuild it if outdated.
+
+        Only one snapshot is built at a time: sessions that ask for the
+        snapshot while it is being rebuilt wait for the result.
+
+        Args:
+            builder (Callable[[int], LunchSnapshot]): function that takes the
+                current version and returns a new snapshot.
+
+        Returns:
+            LunchSnapshot: up to date lunch snapshot.
+        """
+        with self._lock:
+            if (
+                self._snapshot is None
+                or self._snapshot.version != self._version
+                or self._snapshot.date != dt.date.today()
+            ):
+                self._snapshot = builder(self._version)
+                log.debug(f"lunch snapshot rebuilt {self._snapshot}")
+
+            return self._snapshot
+
+    def clear(self) -> None:
+        """Drop the cached snapshot."""
+        with self._lock:
+            self._snapshot = None
+
+
+class ChangeEvent:
+    """Event published on the change feed when lunch data changes.
+
+    Args:
+        topic (str): what changed (e.g. `orders`, `menu`, `no_more_orders`).
+        version (int): lunch state version after the change.
+        origin (Document | None): Bokeh document of the session that made the
+            change (`None` if the change does not come from a session).
+    """
+
+    def __init__(
+        self, topic: str, version: int, origin: Document | None = None
+    ) -> None:
+        self.topic: str = topic
+        """What changed (e.g. `orders`, `menu`, `no_more_orders`)."""
+        self.version: int = version
+        """Lunch state version after the change."""
+        self.origin: Document | None = origin
+        """Bokeh document of the session that made the change."""
+
+    def __repr__(self) -> str:
+        """Simple object representation.
+
+        Returns:
+            str: string representation.
+        """
+        return f"<CHANGE_EVENT:{self.topic} - v{self.version}>"
+
+
+class _Subscriber:
+    """Live session subscribed to the change feed.
+
+    Args:
+        doc (Document | None): Bokeh document of the session.
+        callback (Callable[[ChangeEvent], None]): function called with the
+            published event, inside the session context.
+    """
+
+    def __init__(
+        self,
+        doc: Document | None,
+        callback: Callable[[ChangeEvent], None],
+    ) -> None:
+        self.doc: Document | None = doc
+        """Bokeh document of the session."""
+        self.callback: Callable[[ChangeEvent], None] = callback
+        """Function called with the published event."""
+        self.pending: bool = False
+        """True if an update is already scheduled for this session."""
+
+    def run(self, event: ChangeEvent) -> None:
+        """Run the callback (events published while an update was pending
+        are merged into this call).
+
+        Args:
+            event (ChangeEvent): event that scheduled the update.
+        """
+        self.pending = False
+        self.callback(event)
+
+
+class ChangeFeed:
+    """Publish/subscribe change feed used to push updates to live sessions.
+
+    Callbacks are scheduled on the event loop of each subscribed session
+    (through `pn.state.execute`), so that widgets can be updated safely.
+    Bursts of changes are merged: a session with an update already pending
+    is not scheduled again.
+    """
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        """Lock used to protect the subscribers dictionary."""
+        self._tokens: itertools.count = itertools.count(1)
+        """Generator of subscription tokens."""
+        self._subscribers: dict[int, _Subscriber] = {}
+        """Subscribed sessions (keys are subscription tokens)."""
+        self.notifier: "Notifier | None" = None
+        """Notifier used to share changes with other processes
+        (`None` if changes are not shared)."""
+
+    def __len__(self) -> int:
+        """Number of subscribed sessions.
+
+        Returns:
+            int: number of subscribers.
+        """
+        return len(self._subscribers)
+
+    def subscribe(
+        self,
+        callback: Callable[[ChangeEvent], None],
+        doc: Document | None = None,
+    ) -> int:
+        """Subscribe a session to the change feed.
+
+        Args:
+            callback (Callable[[ChangeEvent], None]): function called with the
+                published event, inside the session context.
+            doc (Document | None, optional): Bokeh document of the session.
+                Defaults to the current document (`pn.state.curdoc`).
+
+        Returns:
+            int: subscription token (used to unsubscribe).
+        """
+        doc = doc or pn.state.curdoc
+        with self._lock:
+            token = next(self._tokens)
+            self._subscribers[token] = _Subscriber(doc=doc, callback=callback)
+        log.debug(f"session subscribed to change feed (token {token})")
+
+        return token
+
+    def unsubscribe(self, token: int) -> None:
+        """Remove a session from the change feed.
+
+        Args:
+            token (int): subscription token returned by `subscribe`.
+        """
+        with self._lock:
+            self._subscribers.pop(token, None)
+        log.debug(f"session unsubscribed from change feed (token {token})")
+
+    def publish(self, topic: str, version: int | None = None) -> ChangeEvent:
+        """Publish a change to all subscribed sessions.
+
+        The session that originated the change (if any) is skipped, since it
+        already updates its own widgets.
+
+        Args:
+            topic (str): what changed (e.g. `orders`, `menu`, `no_more_orders`).
+            version (int | None, optional): lunch state version after the change.
+                Defaults to the current version.
+
+        Returns:
+            ChangeEvent: published event.
+        """
+        event = ChangeEvent(
+            topic=topic,
+            version=lunch_state.version if version is None else version,
+            origin=pn.state.curdoc,
+        )
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        log.debug(f"publish {event} to {len(subscribers)} subscribers")
+        for subscriber in subscribers:
+            # Skip the originating session and sessions with a pending update
+            if (
+                event.origin is not None and subscriber.doc is event.origin
+            ) or subscriber.pending:
+                continue
+            subscriber.pending = True
+            with set_curdoc(subscriber.doc):
+                pn.state.execute(partial(subscriber.run, event), schedule=True)
+
+        return event
+
+
+# PROCESS-WIDE STATE ----------------------------------------------------------
+lunch_state: LunchState = LunchState()
+"""Lunch state shared by all sessions of this process."""
+change_feed: ChangeFeed = ChangeFeed()
+"""Change feed shared by all sessions of this process."""
+
+
+# FUNCTIONS -------------------------------------------------------------------
+def notify_change(
+    topic: str, bump_version: bool = True, propagate: bool = True
+) -> ChangeEvent:
+    """Notify a change of the lunch data.
+
+    The lunch state version is bumped (if requested) and the change is
+    published to live sessions and, if a notifier is set, to other processes.
+
+    Args:
+        topic (str): what changed (e.g. `orders`, `menu`, `no_more_orders`).
+        bump_version (bool, optional): set to `False` if the change does not
+            affect the lunch snapshot. Defaults to True.
+        propagate (bool, optional): set to `False` if the change must not be
+            sent to other processes (e.g. because it comes from another
+            process). Defaults to True.
+
+    Returns:
+        ChangeEvent: published event.
+    """
+    if bump_version:
+        version = lunch_state.bump_version()
+    else:
+        version = lunch_state.version
+
+    if propagate and change_feed.notifier is not None:
+        change_feed.notifier.notify(topic=topic, bump_version=bump_version)
+
+    return change_feed.publish(topic=topic, version=version)
+
+
+def set_notifier(notifier: "Notifier", listen: bool = True) -> None:
+    """Set the notifier used to share changes with other processes.
+
+    Args:
+        notifier (Notifier): notifier instance.
+        listen (bool, optional): if `True` changes made by other processes
+            bump the lunch state version and are published to live sessions
+            of this process. Set it to `False` for processes without sessions
+            (e.g. the CLI). Defaults to True.
+    """
+    change_feed.notifier = notifier
+    if listen:
+        notifier.start(on_change=_on_remote_change)
+
+
+def _on_remote_change(topic: str, bump_version: bool) -> None:
+    """Handle a change notified by another process.
+
+    Args:
+        topic (str): what changed.
+        bump_version (bool): `True` if the change affects the lunch snapshot.
+    """
+    notify_change(topic=topic, bump_version=bump_version, propagate=False)
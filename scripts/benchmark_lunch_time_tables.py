@@ -0,0 +1,229 @@
+#! python
+# This script compares the legacy (loop over lunch times with pivot tables)
+# and the current (single-pass grouping) implementations of the function that
+# builds the orders tables shown in the app and exported to Excel.
+# Synthetic orders are stored in an in-memory SQLite database and aggregated
+# with the queries of the SQLite configuration (the current implementation
+# reads orders already aggregated by the database).
+# Script arguments are passed to Hydra.
+
+import random
+import sys
+import timeit
+
+import pandas as pd
+from hydra import compose, initialize
+from omegaconf import DictConfig
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from dlunch.core import Waiter
+
+# PARAMETERS ------------------------------------------------------------------
+N_USERS = 500
+N_ITEMS = 60
+LUNCH_TIMES = ["11:30", "12:00", "12:30", "13:00", "13:30"]
+NOTES = ["", "", "", "no salt", "big", "no cheese", "well done"]
+TAKEAWAY_RATIO = 0.3
+REPEAT = 20
+SEED = 42
+
+# Command arguments (for Hydra)
+hydra_args = sys.argv[1:]
+
+# global initialization
+initialize(
+    config_path="../dlunch/conf",
+    job_name="script_benchmark_lunch_time_tables",
+    version_base="1.3",
+)
+config = compose(config_name="config", overrides=["db=sqlite", *hydra_args])
+
+
+# SYNTHETIC DATA --------------------------------------------------------------
+rnd = random.Random(SEED)
+original_order = pd.Series(
+    [f"item {i}" for i in range(N_ITEMS)],
+    index=pd.Index(range(1, N_ITEMS + 1), name="id"),
+    name="item",
+)
+users = [f"user_{u:03d}" for u in range(N_USERS)]
+takeaway_list = [u for u in users if rnd.random() < TAKEAWAY_RATIO]
+lunch_times = {u: rnd.choice(LUNCH_TIMES) for u in users}
+df_orders = pd.DataFrame(
+    [
+        {
+            "user": user,
+            "lunch_time": lunch_times[user],
+            "item": item,
+            "note": rnd.choice(NOTES),
+        }
+        for user in users
+        for item in rnd.sample(list(original_order), rnd.randint(1, 4))
+    ]
+)
+
+# In-memory database with the same tables used by queries
+engine = create_engine("sqlite://")
+with engine.begin() as connection:
+    original_order.reset_index().to_sql("menu", connection, index=False)
+    pd.DataFrame(
+        {
+            "id": users,
+            "lunch_time": [lunch_times[u] for u in users],
+            "takeaway": [u in takeaway_list for u in users],
+        }
+    ).to_sql("users", connection, index=False)
+    df_orders.assign(
+        menu_item_id=df_orders["item"].map(
+            pd.Series(original_order.index, index=original_order)
+        )
+    )[["user", "menu_item_id", "note"]].to_sql(
+        "orders", connection, index=False
+    )
+
+
+# LEGACY IMPLEMENTATION -------------------------------------------------------
+def legacy_build_lunch_time_tables(
+    config: DictConfig,
+    df: pd.DataFrame,
+    original_order: pd.Series,
+    takeaway_list: list[str],
+) -> dict:
+    def _clean_up_table(
+        config: DictConfig,
+        df_in: pd.DataFrame,
+        df_complete: pd.DataFrame,
+    ):
+        df = df_in.copy()
+        df_notes = (
+            df_complete[
+                (df_complete.lunch_time == time)
+                & (df_complete.note != "")
+                & (df_complete.user.isin(df.columns))
+            ]
+            .drop(columns=["user", "lunch_time"])
+            .value_counts()
+            .reset_index(level="note")
+        )
+        df_notes.note = (
+            df_notes["count"]
+            .astype(str)
+            .str.cat(df_notes.note, sep=config.panel.gui.note_sep.count)
+        )
+        df_notes = df_notes.drop(columns="count")
+        df_notes = (
+            df_notes.groupby("item")["note"]
+            .apply(config.panel.gui.note_sep.element.join)
+            .to_frame()
+        )
+        df[config.panel.gui.total_column_name] = df.sum(axis=1)
+        if config.panel.drop_unused_menu_items:
+            df = df[df[config.panel.gui.total_column_name] > 0]
+        df = df.join(df_notes)
+        df = df.rename(columns={"note": config.panel.gui.note_column_name})
+        df = df.fillna("-")
+        df = df.astype(object)
+
+        return df
+
+    df_dict = {}
+    for time in df.lunch_time.sort_values().unique():
+        temp_df = (
+            df[df.lunch_time == time]
+            .drop(columns=["lunch_time", "note"])
+            .reset_index(drop=True)
+        )
+        df_users = temp_df.pivot_table(
+            index="item", columns="user", aggfunc=len
+        )
+        df_users = df_users.reindex(original_order)
+        df_users_restaurant = df_users.loc[
+            :, [c for c in df_users.columns if c not in takeaway_list]
+        ]
+        df_users_takeaways = df_users.loc[
+            :, [c for c in df_users.columns if c in takeaway_list]
+        ]
+        if not df_users_restaurant.empty:
+            df_dict[time] = _clean_up_table(config, df_users_restaurant, df)
+        if not df_users_takeaways.empty:
+            df_dict[f"{time} {config.panel.gui.takeaway_id}"] = (
+                _clean_up_table(config, df_users_takeaways, df)
+            )
+
+    return df_dict
+
+
+# CURRENT IMPLEMENTATION ------------------------------------------------------
+waiter = Waiter(config=config)
+
+
+def current_build_lunch_time_tables() -> dict:
+    # Summary is read as the app does (notes are aggregated with pandas when
+    # SQLite is older than 3.44)
+    with Session(engine) as session:
+        df_selections = waiter.database_connector.read_sql_query(
+            session=session,
+            query=config.db.orders_selections_query.format(schema=""),
+        )
+        df_summary = waiter.read_orders_summary(session=session, schema="")
+
+    return waiter.build_lunch_time_tables(
+        df_selections=df_selections,
+        df_summary=df_summary,
+        original_order=original_order,
+    )
+
+
+# BENCHMARK -------------------------------------------------------------------
+
+legacy_result = legacy_build_lunch_time_tables(
+    config, df_orders, original_order, takeaway_list
+)
+current_result = current_build_lunch_time_tables()
+
+
+# Check that results are the same
+# Notes with the same count are sorted differently (the legacy implementation
+# does not use a stable sort), so notes are compared after sorting them
+def _sort_notes(df: pd.DataFrame) -> pd.DataFrame:
+    note_column = config.panel.gui.note_column_name
+    sep = config.panel.gui.note_sep.element
+    return df.assign(
+        **{
+            note_column: df[note_column].map(
+                lambda notes: sep.join(sorted(notes.split(sep)))
+            )
+        }
+    )
+
+
+assert list(legacy_result) == list(current_result), "different tables"
+for key, df_legacy in legacy_result.items():
+    pd.testing.assert_frame_equal(
+        _sort_notes(df_legacy), _sort_notes(current_result[key])
+    )
+
+legacy_time = min(
+    timeit.repeat(
+        lambda: legacy_build_lunch_time_tables(
+            config, df_orders, original_order, takeaway_list
+        ),
+        number=1,
+        repeat=REPEAT,
+    )
+)
+current_time = min(
+    timeit.repeat(
+        current_build_lunch_time_tables,
+        number=1,
+        repeat=REPEAT,
+    )
+)
+
+print(
+    f"{N_USERS} users x {N_ITEMS} menu items ({len(df_orders)} orders, {len(current_result)} tables)"
+)
+print(f"legacy:  {legacy_time * 1000:.1f} ms")
+print(f"current: {current_time * 1000:.1f} ms")
+print(f"speedup: {legacy_time / current_time:.1f}x")
@@ -0,0 +1,104 @@
+#! python
+# This script compares OCR on raw menu images and on preprocessed images
+# (see the panel.menu_ocr.preprocessing configuration).
+# The first argument is a folder with sample menu images (.png, .jpg, .jpeg).
+# For each image an optional text file with the same name (e.g. menu_1.txt
+# for menu_1.jpg) lists the expected menu items, one per row: it is used to
+# compute the line accuracy (share of expected items found by OCR).
+# The other script arguments are passed to Hydra, e.g. to check the steps
+# disabled by default:
+# panel.menu_ocr.preprocessing.binarize=true
+# panel.menu_ocr.preprocessing.deskew=true
+# panel.menu_ocr.preprocessing.crop=true
+
+import pathlib
+import sys
+import time
+
+import pandas as pd
+from hydra import compose, initialize
+
+from dlunch import ocr
+
+# Command arguments (sample images folder and Hydra arguments)
+samples_folder = pathlib.Path(sys.argv[1])
+hydra_args = sys.argv[2:]
+
+# global initialization
+initialize(
+    config_path="../dlunch/conf",
+    job_name="script_benchmark_menu_ocr",
+    version_base="1.3",
+)
+config = compose(config_name="config", overrides=hydra_args)
+
+
+# FUNCTIONS -------------------------------------------------------------------
+def normalize(row: str) -> str:
+    return " ".join(row.lower().split())
+
+
+def line_accuracy(rows: list[str], expected_rows: list[str]) -> float | None:
+    if not expected_rows:
+        return None
+    found_rows = {normalize(row) for row in rows}
+    return sum(normalize(row) in found_rows for row in expected_rows) / len(
+        expected_rows
+    )
+
+
+# BENCHMARK -------------------------------------------------------------------
+options = ocr.get_ocr_options(config)
+raw_options = {
+    **options,
+    "preprocessing": {**options["preprocessing"], "enabled": False},
+}
+preprocessed_options = {
+    **options,
+    "preprocessing": {**options["preprocessing"], "enabled": True},
+}
+
+results = []
+for image_path in sorted(samples_folder.iterdir()):
+    if image_path.suffix.lower() not in ocr.IMAGE_EXTENSIONS:
+        continue
+    expected_path = image_path.with_suffix(".txt")
+    expected_rows = (
+        ocr.text_to_rows(expected_path.read_text())
+        if expected_path.exists()
+        else []
+    )
+    for label, ocr_options in (
+        ("raw", raw_options),
+        ("preprocessed", preprocessed_options),
+    ):
+        start = time.perf_counter()
+        rows = ocr.text_to_rows(
+            ocr.image_to_text(str(image_path), ocr_options)
+        )
+        elapsed = time.perf_counter() - start
+        results.append(
+            {
+                "image": image_path.name,
+                "mode": label,
+                "time_s": round(elapsed, 2),
+                "rows": len(rows),
+                "accuracy": line_accuracy(rows, expected_rows),
+            }
+        )
+        print(
+            f"{image_path.name} ({label}): {elapsed:.2f} s, {len(rows)} rows"
+        )
+
+if not results:
+    sys.exit(f"no images found in {samples_folder}")
+
+df_results = pd.DataFrame(results)
+print()
+print(df_results.to_string(index=False))
+print()
+print(
+    df_results.groupby("mode", sort=False)[["time_s", "accuracy"]]
+    .mean()
+    .to_string()
+)